@@ -1,34 +1,629 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
 import time
 import warnings
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import seaborn as sns
 from collections import Counter
 import random
 import re
 import json
+import math
+import itertools
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import os
+import gzip
+import hashlib
+import queue
+import sys
+import atexit
+import subprocess
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 warnings.filterwarnings('ignore')
 
-# 设置中文字体
-import matplotlib
-matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans', 'Arial Unicode MS']
-matplotlib.rcParams['axes.unicode_minus'] = False
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+
+class _LazyImport:
+    """延迟导入：第一次访问属性或调用时才导入模块（可选取模块中的属性），并执行setup"""
+
+    def __init__(self, module_name, attribute=None, setup=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._setup = setup
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._module_name)
+            target = getattr(module, self._attribute) if self._attribute else module
+            if self._setup is not None:
+                self._setup(target)
+            self._target = target
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
+def _configure_matplotlib(pyplot):
+    """设置中文字体（第一次绘图时执行）"""
+    pyplot.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans', 'Arial Unicode MS']
+    pyplot.rcParams['axes.unicode_minus'] = False
+
+
+# 重量级依赖在第一次使用时才导入：selenium只在浏览器爬取时加载，matplotlib/seaborn只在绘图时加载
+requests = _LazyImport('requests')
+BeautifulSoup = _LazyImport('bs4', 'BeautifulSoup')
+pd = _LazyImport('pandas')
+plt = _LazyImport('matplotlib.pyplot', setup=_configure_matplotlib)
+sns = _LazyImport('seaborn')
+webdriver = _LazyImport('selenium.webdriver')
+Service = _LazyImport('selenium.webdriver.chrome.service', 'Service')
+ChromeDriverManager = _LazyImport('webdriver_manager.chrome', 'ChromeDriverManager')
+By = _LazyImport('selenium.webdriver.common.by', 'By')
+WebDriverWait = _LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+EC = _LazyImport('selenium.webdriver.support.expected_conditions')
+
+# 可选的编译型HTML解析器，安装后自动用于解析开奖页面
+_OPTIONAL_MODULES = {}
+
+
+def _import_optional(name, candidates):
+    """按顺序尝试导入(模块, 属性)，返回第一个可用的对象，都不可用时返回None"""
+    if name not in _OPTIONAL_MODULES:
+        _OPTIONAL_MODULES[name] = None
+        for module_name, attribute in candidates:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            _OPTIONAL_MODULES[name] = getattr(module, attribute) if attribute else module
+            break
+    return _OPTIONAL_MODULES[name]
+
+
+def _selectolax_parser():
+    return _import_optional('selectolax', [('selectolax.lexbor', 'LexborHTMLParser'),
+                                           ('selectolax.parser', 'HTMLParser')])
+
+
+def _lxml_html():
+    return _import_optional('lxml', [('lxml.html', None)])
+
+
+# 中彩网开奖查询接口（"近100期"按钮调用的JSONP接口）
+DLT_API_URL = "https://jc.zhcw.com/port/client_json.php"
+DLT_LOTTERY_ID = '281'
+# 按期号查询全部历史时使用的期数上限
+MAX_ISSUE_COUNT = 5000
+# 作业要求只分析2025年7月1日之前的开奖数据
+CUTOFF_DATE = datetime(2025, 7, 1)
+
+
+def parse_jsonp(text):
+    """去掉JSONP回调包装，返回JSON对象"""
+    text = text.strip()
+    match = re.match(r'^[\w$.]+\((.*)\)\s*;?$', text, re.S)
+    if match:
+        text = match.group(1)
+    return json.loads(text)
+
+
+# 开奖表格每行需要的列数
+LOTTERY_TABLE_COLUMNS = 14
+
+
+def _extract_rows_bs4(html_content):
+    """使用BeautifulSoup提取开奖表格，返回(状态, 行数据列表)"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    table = soup.find('table')
+    if not table:
+        return 'no_table', []
+    tbody = table.find('tbody')
+    if not tbody:
+        return 'no_tbody', []
+
+    rows = []
+    for row in tbody.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) < LOTTERY_TABLE_COLUMNS:
+            rows.append(None)
+            continue
+        texts = [cell.get_text(strip=True) for cell in cells[:LOTTERY_TABLE_COLUMNS]]
+        front_numbers = [span.get_text(strip=True) for span in cells[2].find_all('span', class_='jqh')]
+        back_numbers = [span.get_text(strip=True) for span in cells[3].find_all('span', class_='jql')]
+        rows.append((texts, front_numbers, back_numbers))
+    return 'ok', rows
+
+
+def _lxml_text(element):
+    """与get_text(strip=True)一致的lxml文本提取"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def _extract_rows_lxml(html_content):
+    """使用lxml提取开奖表格，返回(状态, 行数据列表)"""
+    document = _lxml_html().fromstring(html_content)
+    table = next(document.iter('table'), None)
+    if table is None:
+        return 'no_table', []
+    tbody = next(table.iter('tbody'), None)
+    if tbody is None:
+        return 'no_tbody', []
+
+    def spans(cell, class_name):
+        return [_lxml_text(span) for span in cell.iter('span')
+                if class_name in (span.get('class') or '').split()]
+
+    rows = []
+    for row in tbody.iter('tr'):
+        cells = list(row.iter('td'))
+        if len(cells) < LOTTERY_TABLE_COLUMNS:
+            rows.append(None)
+            continue
+        texts = [_lxml_text(cell) for cell in cells[:LOTTERY_TABLE_COLUMNS]]
+        rows.append((texts, spans(cells[2], 'jqh'), spans(cells[3], 'jql')))
+    return 'ok', rows
+
+
+# 第一个表格开始标签之后、结束标签之前是否有真实的<tbody>标签
+FIRST_TABLE_TBODY_RE = re.compile(r'<table\b(?:(?!</table\s*>).)*?<tbody\b', re.I | re.S)
+
+
+def _extract_rows_selectolax(html_content):
+    """使用selectolax提取开奖表格，返回(状态, 行数据列表)"""
+    tree = _selectolax_parser()(html_content)
+    table = tree.css_first('table')
+    if table is None:
+        return 'no_table', []
+    # lexbor按HTML5规则解析，会为没有tbody的表格自动补上tbody；以源码为准，与bs4/lxml保持一致
+    tbody = table.css_first('tbody') if FIRST_TABLE_TBODY_RE.search(html_content) else None
+    if tbody is None:
+        return 'no_tbody', []
+
+    rows = []
+    for row in tbody.css('tr'):
+        cells = row.css('td')
+        if len(cells) < LOTTERY_TABLE_COLUMNS:
+            rows.append(None)
+            continue
+        texts = [cell.text(deep=True, separator='', strip=True) for cell in cells[:LOTTERY_TABLE_COLUMNS]]
+        front_numbers = [span.text(deep=True, separator='', strip=True) for span in cells[2].css('span.jqh')]
+        back_numbers = [span.text(deep=True, separator='', strip=True) for span in cells[3].css('span.jql')]
+        rows.append((texts, front_numbers, back_numbers))
+    return 'ok', rows
+
+
+# 解析后端，按速度从快到慢排列
+PARSER_BACKENDS = {
+    'selectolax': _extract_rows_selectolax,
+    'lxml': _extract_rows_lxml,
+    'bs4': _extract_rows_bs4,
+}
+
+
+def available_parsers():
+    """返回当前环境可用的解析后端名称"""
+    # 只检查是否安装，不在这里导入
+    installed = {'selectolax': importlib.util.find_spec('selectolax') is not None,
+                 'lxml': importlib.util.find_spec('lxml') is not None, 'bs4': True}
+    return [name for name in PARSER_BACKENDS if installed[name]]
+
+
+def select_parser(name=None):
+    """选择解析后端，未指定时自动选用可用的最快后端"""
+    if name is None:
+        return available_parsers()[0]
+    if name not in available_parsers():
+        raise ValueError(f"解析后端 {name} 不可用，可选：{', '.join(available_parsers())}")
+    return name
+
+
+class RateLimiter:
+    """线程安全的自适应令牌桶限速器：所有请求共享，按观察到的响应时间和429/5xx状态调整速率"""
+
+    def __init__(self, rate=5.0, burst=None, min_rate=0.2, max_rate=None, target_latency=1.0):
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate or rate * 2
+        self.step = rate / 10
+        # 响应时间超过target_latency秒视为站点变慢
+        self.target_latency = target_latency
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait(self):
+        """阻塞到取得一个令牌"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = max(self._blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+
+    def record(self, elapsed, status=200, backoff=0.0):
+        """记录一次请求结果：429/5xx时速率减半并暂停backoff秒，变慢时降速，正常时缓慢提速"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status == 429 or status >= 500:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = 0.0
+                self._blocked_until = max(self._blocked_until, now + backoff)
+            elif elapsed > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.step)
+
+
+# 各数据源的缓存有效期（秒），按URL中的关键字匹配；过期后带ETag/Last-Modified重新验证
+CACHE_TTLS = {
+    # 开奖列表按期号倒序分页，新开奖会让每一页的内容都发生移位，因此不设有效期，每次都用ETag重新验证
+    'client_json.php': 0,          # 开奖接口
+    'kjxx/dlt': 0,                 # 开奖页面
+    'rankingList': 3600,           # 专家排行变化较快
+    'expertItem': 7 * 24 * 3600,   # 专家资料很少变化
+}
+DEFAULT_CACHE_TTL = 3600
+
+
+class ResponseCache:
+    """磁盘响应缓存：按URL和参数为键，gzip压缩保存，按数据源设置有效期，超出容量时淘汰最久未使用的条目"""
+
+    # 每次请求都会变化、不影响响应内容的参数
+    IGNORED_PARAMS = ('tt', '_')
+
+    def __init__(self, cache_dir='.http_cache', max_bytes=64 * 1024 * 1024, ttls=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # 缓存总大小只在启动时扫描一次，之后随写入增量维护
+        self._total = sum(size for _, size, _ in self._entries())
+
+    def key(self, url, params=None):
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items() if k not in self.IGNORED_PARAMS)
+        return hashlib.sha1(json.dumps([url, items]).encode('utf-8')).hexdigest()
+
+    def ttl(self, url):
+        return next((ttl for pattern, ttl in self.ttls.items() if pattern in url), DEFAULT_CACHE_TTL)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.gz')
+
+    def load(self, key):
+        """读取缓存条目，返回(元数据, 内容字节)，不存在时返回None"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                header, body = f.read().split(b'\n', 1)
+            os.utime(path)  # 修改时间作为最近使用时间
+        except (OSError, ValueError, EOFError):
+            return None
+        return json.loads(header), body
+
+    def store(self, key, url, body, headers=None):
+        """保存响应内容及用于重新验证的ETag/Last-Modified"""
+        meta = {'url': url, 'stored_at': time.time()}
+        for name in ('ETag', 'Last-Modified', 'Content-Type'):
+            if headers and headers.get(name):
+                meta[name] = headers[name]
+        path = self._path(key)
+        tmp_path = path + f'.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode('utf-8') + b'\n' + body)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            try:
+                self._total -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._total += size
+            over_limit = self._total > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def is_fresh(self, meta):
+        return time.time() - meta['stored_at'] < self.ttl(meta['url'])
+
+    def _entries(self):
+        """扫描缓存目录，返回[(最近使用时间, 大小, 路径)]"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.gz'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """总大小超过max_bytes时按最近使用时间淘汰，一次淘汰到容量的90%，避免之后每次写入都重新扫描"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                self._total = total
+                return
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+            self._total = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                os.remove(path)
+            self._total = 0
+
+
+def _cached_response(url, meta, body):
+    """由缓存条目构造requests响应对象"""
+    response = requests.models.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.headers.update({name: meta[name] for name in ('ETag', 'Last-Modified', 'Content-Type') if name in meta})
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+class HttpFetcher:
+    """两个爬虫共用的HTTP请求层：每个请求先经过限速器，429/5xx时按Retry-After或指数退避重试；
+    配置了ResponseCache时优先使用未过期的缓存，过期条目用ETag/Last-Modified条件请求重新验证"""
+
+    def __init__(self, session, rate_limiter=None, retries=3, cache=None):
+        self.session = session
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retries = retries
+        self.cache = cache
+
+    def get(self, url, **kwargs):
+        if self.cache is None:
+            return self._get(url, **kwargs)
+
+        key = self.cache.key(url, kwargs.get('params'))
+        entry = self.cache.load(key)
+        if entry is not None:
+            meta, body = entry
+            if self.cache.is_fresh(meta):
+                return _cached_response(url, meta, body)
+            # 过期条目发送条件请求
+            headers = dict(kwargs.pop('headers', None) or {})
+            if 'ETag' in meta:
+                headers['If-None-Match'] = meta['ETag']
+            if 'Last-Modified' in meta:
+                headers['If-Modified-Since'] = meta['Last-Modified']
+            kwargs['headers'] = headers
+
+        response = self._get(url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            # 未修改：沿用缓存内容并重新计算有效期
+            self.cache.store(key, url, body, meta)
+            return _cached_response(url, meta, body)
+        self.cache.store(key, url, response.content, response.headers)
+        return response
+
+    def _get(self, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            start = time.monotonic()
+            response = self.session.get(url, **kwargs)
+            elapsed = time.monotonic() - start
+            status = response.status_code
+            if status != 429 and status < 500:
+                self.rate_limiter.record(elapsed, status)
+                break
+            retry_after = response.headers.get('Retry-After', '')
+            backoff = float(retry_after) if retry_after.isdigit() else 0.5 * 2 ** attempt
+            self.rate_limiter.record(elapsed, status, backoff)
+            if attempt < self.retries:
+                print(f"请求 {urlparse(url).path} 返回 {status}，{backoff:.1f}秒后重试...")
+        response.raise_for_status()
+        return response
+
+
+def table_signature(driver):
+    """当前页面开奖表格的(行数, 首行期号, 分页页码, 期数按钮状态)，用于判断点击后表格是否已刷新；
+    默认视图已包含最新几期时，点击"近100期"后首行不变，需要依靠分页和按钮状态的变化判断"""
+    return tuple(driver.execute_script(
+        "var rows = document.querySelectorAll('table tbody tr');"
+        "var first = rows.length && rows[0].cells.length ? rows[0].cells[0].textContent.trim() : '';"
+        "var pager = Array.prototype.map.call(document.querySelectorAll('li a[title]'),"
+        " function (a) { return a.getAttribute('title'); }).join(',');"
+        "var buttons = Array.prototype.map.call(document.querySelectorAll('span.annq'),"
+        " function (span) { return span.className; }).join('|');"
+        "return [rows.length, first, pager, buttons];"))
+
+
+def wait_for_table_change(driver, previous, timeout=15):
+    """等待开奖表格有数据且内容与previous不同，页面就绪即返回"""
+    def changed(d):
+        signature = table_signature(d)
+        return signature[0] > 0 and signature != previous
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(changed)
+
+
+class BrowserPool:
+    """共享的无头Chrome浏览器池：驱动路径只解析一次并缓存到磁盘，浏览器实例保持启动状态供两个爬虫借用"""
+
+    def __init__(self, size=1, headless=True, cache_file='.chromedriver_cache.json', factory=None):
+        self.size = size
+        self.headless = headless
+        self.cache_file = cache_file
+        self.driver_path = None
+        # factory用于创建浏览器实例，默认启动Chrome（测试时可传入替身）
+        self.factory = factory or self._create_driver
+        # 空闲实例和已创建数量由同一个条件变量保护，归还或丢弃实例时唤醒等待者
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def resolve_driver_path(self):
+        """解析chromedriver路径：环境变量CHROMEDRIVER > 磁盘缓存 > ChromeDriverManager下载（结果写入缓存）"""
+        if self.driver_path:
+            return self.driver_path
+
+        path = os.environ.get('CHROMEDRIVER')
+        if not path and os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    path = json.load(f).get('driver_path')
+            except (OSError, json.JSONDecodeError):
+                path = None
+        if not path or not os.path.exists(path):
+            print("正在解析chromedriver路径...")
+            path = ChromeDriverManager().install()
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'driver_path': path, 'resolved_at': datetime.now().isoformat(timespec='seconds')}, f)
+
+        self.driver_path = path
+        return path
+
+    def _create_driver(self):
+        """启动一个配置好的Chrome实例"""
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument('--headless')  # 无头模式
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+
+        driver = webdriver.Chrome(service=Service(self.resolve_driver_path()), options=options)
+        # 执行脚本隐藏webdriver特征
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+
+    def warm_up(self):
+        """预先启动全部浏览器实例"""
+        while True:
+            with self._cond:
+                if self._created >= self.size:
+                    break
+                self._created += 1
+            driver = self._new_driver()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def _new_driver(self):
+        """创建实例；失败时释放已占用的名额"""
+        try:
+            return self.factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def acquire(self, timeout=None):
+        """借出一个浏览器；有空闲实例时直接借出，池未满时新建，否则等待其他使用者归还或丢弃实例"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"等待浏览器超过{timeout}秒")
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        return self._new_driver()
+
+    def release(self, driver, broken=False):
+        """归还浏览器；出错的实例直接关闭，空出的名额留给等待者新建"""
+        if broken:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+        else:
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    @contextlib.contextmanager
+    def driver(self, timeout=None):
+        """with pool.driver() as driver: 借用浏览器，使用中抛出异常时丢弃该实例"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, broken=True)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        """关闭池中全部空闲浏览器"""
+        with self._cond:
+            drivers, self._idle = self._idle, []
+            self._created -= len(drivers)
+            self._cond.notify_all()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_browser_pool = None
+
+
+def get_browser_pool(size=1):
+    """返回进程内共享的浏览器池，第一次调用时创建，进程退出时关闭"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(size=size)
+        atexit.register(_browser_pool.close)
+    elif size > _browser_pool.size:
+        with _browser_pool._cond:
+            _browser_pool.size = size
+            _browser_pool._cond.notify_all()
+    return _browser_pool
+
 
 class DLTSpider:
-    def __init__(self):
+    def __init__(self, backend='http', api_url=None, parser=None, corpus_dir=None, rate=10.0, cache=None):
         self.base_url = "https://www.zhcw.com/kjxx/dlt/"
+        self.api_url = api_url or DLT_API_URL
+        # http: 直接请求JSON接口；browser: 使用selenium渲染页面
+        self.backend = backend
+        # HTML解析后端，None表示自动选择
+        self.parser = parser
+        # 保存浏览器获取的开奖页面，作为解析基准测试的语料
+        self.corpus_dir = corpus_dir
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -39,181 +634,328 @@ class DLTSpider:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # cache为ResponseCache时重复运行只请求可能变化的数据
+        self.fetcher = HttpFetcher(self.session, RateLimiter(rate), cache=cache)
         
     def get_page_data(self):
         """使用selenium动态爬取大乐透数据"""
         html_content_list = []
-        driver = None
 
         try:
-            # 配置浏览器选项
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')  # 无头模式
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-
-            # 执行脚本隐藏webdriver特征
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-            print("正在访问大乐透开奖页面...")
-            driver.get(self.base_url)
-            time.sleep(3)
-
-            # 等待页面加载完成
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "annq"))
-            )
-
-            # 点击"近100期"按钮
-            print("点击近100期按钮...")
-            try:
-                recent_100_button = driver.find_element(By.CSS_SELECTOR, 'span.annq[data-z="100"]')
-                driver.execute_script("arguments[0].click();", recent_100_button)
-                time.sleep(3)
+            # 从共享浏览器池借用已启动的浏览器
+            with get_browser_pool().driver() as driver:
+                print("正在访问大乐透开奖页面...")
+                driver.get(self.base_url)
 
-                # 等待表格数据加载
+                # 等待页面加载完成
                 WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
+                    EC.presence_of_element_located((By.CLASS_NAME, "annq"))
                 )
-                time.sleep(2)
-            except Exception as e:
-                print(f"点击近100期按钮失败: {e}")
-
-            # 获取第1页数据
-            print("获取第1页数据...")
-            html_content_list.append(driver.page_source)
 
-            # 获取其他页面数据（页码2、3、4）
-            for page_num in range(2, 5):  # 页码2、3、4
+                # 点击"近100期"按钮
+                print("点击近100期按钮...")
                 try:
-                    print(f"获取第{page_num}页数据...")
+                    previous = table_signature(driver)
+                    recent_100_button = driver.find_element(By.CSS_SELECTOR, 'span.annq[data-z="100"]')
+                    driver.execute_script("arguments[0].click();", recent_100_button)
 
-                    # 查找并点击对应页码
-                    page_link = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, f'li a[title="{page_num}"]'))
-                    )
-                    driver.execute_script("arguments[0].click();", page_link)
-                    time.sleep(3)
+                    # 等待表格数据刷新
+                    wait_for_table_change(driver, previous)
+                except Exception as e:
+                    print(f"点击近100期按钮失败: {e}")
 
-                    # 等待新页面数据加载
-                    WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "table"))
-                    )
-                    time.sleep(2)
+                # 获取第1页数据
+                print("获取第1页数据...")
+                html_content_list.append(driver.page_source)
 
-                    # 获取当前页面HTML
-                    html_content_list.append(driver.page_source)
+                # 获取其他页面数据（页码2、3、4）
+                for page_num in range(2, 5):  # 页码2、3、4
+                    try:
+                        print(f"获取第{page_num}页数据...")
 
-                except Exception as e:
-                    print(f"获取第{page_num}页数据失败: {e}")
-                    continue
+                        # 查找并点击对应页码
+                        page_link = WebDriverWait(driver, 10).until(
+                            EC.element_to_be_clickable((By.CSS_SELECTOR, f'li a[title="{page_num}"]'))
+                        )
+                        previous = table_signature(driver)
+                        driver.execute_script("arguments[0].click();", page_link)
+
+                        # 等待新页面数据加载
+                        wait_for_table_change(driver, previous)
+
+                        # 获取当前页面HTML
+                        html_content_list.append(driver.page_source)
+
+                    except Exception as e:
+                        print(f"获取第{page_num}页数据失败: {e}")
+                        continue
 
-            driver.quit()
             print(f"成功获取了{len(html_content_list)}页数据")
+            if self.corpus_dir:
+                self.save_corpus(html_content_list)
             return html_content_list
 
         except Exception as e:
             print(f"获取页面数据时出错: {e}")
-            if driver is not None:
-                driver.quit()
             return None
 
-    def parse_lottery_data(self, html_content_list):
-        """解析开奖数据"""
+    def save_corpus(self, html_content_list):
+        """将开奖页面保存到语料目录，文件名使用页内最新期号"""
+        os.makedirs(self.corpus_dir, exist_ok=True)
+        for page_num, html_content in enumerate(html_content_list, 1):
+            match = re.search(r'<td[^>]*>\s*(\d{5})\s*</td>', html_content)
+            name = match.group(1) if match else f"{int(time.time())}_{page_num}"
+            with open(os.path.join(self.corpus_dir, f"dlt_{name}.html"), 'w', encoding='utf-8') as f:
+                f.write(html_content)
+        print(f"已保存{len(html_content_list)}个页面到：{self.corpus_dir}")
+
+    def fetch_api_page(self, page_num=1, page_size=30, issue_count=100):
+        """通过HTTP接口获取一页开奖数据"""
+        params = {
+            'callback': 'jQuery',
+            'transactionType': '10001001',
+            'lotteryId': DLT_LOTTERY_ID,
+            'issueCount': issue_count,
+            'startIssue': '',
+            'endIssue': '',
+            'startDate': '',
+            'endDate': '',
+            'type': '0',
+            'pageNum': page_num,
+            'pageSize': page_size,
+            'tt': random.random(),
+            '_': int(time.time() * 1000),
+        }
+        response = self.fetcher.get(self.api_url, params=params, timeout=10,
+                                    headers={'Referer': self.base_url})
+        return parse_jsonp(response.text)
+
+    def get_api_data(self, target_periods=100, page_size=30):
+        """使用HTTP接口获取最近target_periods期的原始开奖记录"""
+        records = []
+        page_num = 1
+        pages = 1
+
+        while page_num <= pages and len(records) < target_periods:
+            print(f"获取第{page_num}页数据...")
+            result = self.fetch_api_page(page_num, page_size, issue_count=target_periods)
+            page_records = result.get('data') or []
+            if not page_records:
+                break
+            records.extend(page_records)
+            pages = int(result.get('pages') or page_num)
+            page_num += 1
+
+        print(f"成功获取了{len(records)}条接口数据")
+        return records[:target_periods]
+
+    def crawl_new_draws(self, latest_period, page_size=30):
+        """增量获取比latest_period更新的开奖数据，遇到已有期号即停止翻页"""
+        print(f"开始增量获取期号 {latest_period} 之后的开奖数据...")
+        records = []
+        page_num = 1
+        pages = 1
+        request_count = 0
+
+        while page_num <= pages:
+            result = self.fetch_api_page(page_num, page_size, issue_count=MAX_ISSUE_COUNT)
+            request_count += 1
+            page_records = result.get('data') or []
+            if not page_records:
+                break
+
+            new_records = [record for record in page_records if int(record['issue']) > int(latest_period)]
+            records.extend(new_records)
+
+            # 本页已出现本地已有的期号，后续页面都是更早的数据
+            if len(new_records) < len(page_records):
+                break
+            pages = int(result.get('pages') or page_num)
+            page_num += 1
+
+        print(f"请求了{request_count}页，获得{len(records)}期新数据")
+        return self.parse_api_data(records)
+
+    def fetch_api_page_with_retry(self, page_num, page_size=30, issue_count=100, retries=3):
+        """获取一页接口数据，失败时按指数退避重试"""
+        for attempt in range(retries + 1):
+            try:
+                return self.fetch_api_page(page_num, page_size, issue_count)
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                wait = 0.5 * 2 ** attempt
+                print(f"获取第{page_num}页失败（{e}），{wait:.1f}秒后重试...")
+                time.sleep(wait)
+
+    def crawl_full_history(self, filename='大乐透开奖数据.csv', checkpoint_file='dlt_backfill_checkpoint.json',
+                           page_size=100, max_workers=4, retries=3):
+        """并发回溯爬取全部历史开奖数据（2007年首期至今），边爬取边写入本地文件，支持断点续爬"""
+        print("开始回溯获取全部历史开奖数据...")
+
+        # 读取断点信息，页大小变化时断点失效
+        checkpoint = {'page_size': page_size, 'done': []}
+        if os.path.exists(checkpoint_file):
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('page_size') == page_size:
+                checkpoint = saved
+                print(f"从断点继续，已完成{len(checkpoint['done'])}页")
+
+        if os.path.exists(filename):
+            store_df = pd.read_csv(filename, encoding='utf-8-sig', dtype={'期号': str})
+        else:
+            store_df = pd.DataFrame()
+
+        def save_checkpoint():
+            with open(checkpoint_file, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+
+        def save_page(page_num, page_records):
+            nonlocal store_df
+            new_data = self.parse_api_data(page_records)
+            if new_data:
+                store_df = merge_lottery_data(store_df, new_data)
+                store_df.to_csv(filename, index=False, encoding='utf-8-sig')
+            checkpoint['done'] = sorted(set(checkpoint['done']) | {page_num})
+            save_checkpoint()
+
+        # 第1页用于确定总页数和总期数；页面按期号倒序排列，每次都合并第1页以包含最新开奖
+        first_page = self.fetch_api_page_with_retry(1, page_size, MAX_ISSUE_COUNT, retries)
+        pages = int(first_page.get('pages') or 1)
+        total = int(first_page.get('total') or 0)
+        # 断点之后有新开奖时，旧的页码整体后移，按期数差换算仍然完整的页面
+        if checkpoint.get('total') and total and checkpoint['total'] != total:
+            done = shift_done_pages(checkpoint['done'], total - checkpoint['total'], page_size, total)
+            print(f"断点之后新增{total - checkpoint['total']}期开奖，已完成的页面由{len(checkpoint['done'])}页调整为{len(done)}页")
+            checkpoint['done'] = done
+        checkpoint['pages'] = pages
+        checkpoint['total'] = total
+        save_page(1, first_page.get('data') or [])
+
+        pending = [page for page in range(2, pages + 1) if page not in checkpoint['done']]
+        print(f"共{pages}页，待获取{len(pending)}页，并发数{max_workers}")
+
+        failed_pages = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.fetch_api_page_with_retry, page, page_size, MAX_ISSUE_COUNT, retries): page
+                       for page in pending}
+            # 在主线程中按完成顺序写入，避免并发写文件
+            for future in as_completed(futures):
+                page_num = futures[future]
+                try:
+                    save_page(page_num, future.result().get('data') or [])
+                    print(f"第{page_num}页完成（{len(checkpoint['done'])}/{pages}）")
+                except Exception as e:
+                    print(f"获取第{page_num}页数据失败: {e}")
+                    failed_pages.append(page_num)
+
+        if failed_pages:
+            print(f"有{len(failed_pages)}页获取失败，重新运行即可从断点继续：{sorted(failed_pages)}")
+        elif len(store_df) < total:
+            # 爬取过程中有新开奖导致页面移位，期数不完整时保留断点并重新获取全部页面
+            checkpoint['done'] = []
+            save_checkpoint()
+            print(f"本地{len(store_df)}期少于接口的{total}期，数据不完整，请重新运行")
+        elif os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+
+        print(f"历史数据回溯完成，本地共{len(store_df)}期开奖数据")
+        return store_df.to_dict('records')
+
+    def parse_api_data(self, records):
+        """将接口记录转换为与parse_lottery_data相同格式的开奖数据"""
         all_data = []
 
+        for record in records:
+            try:
+                # 一等奖、二等奖的基本投注和追加投注信息
+                winners = {str(item.get('awardEtc')): item for item in record.get('winnerDetails') or []}
+                first = winners.get('1', {})
+                second = winners.get('2', {})
+
+                def award(detail, key, field):
+                    value = (detail.get(key) or {}).get(field, '')
+                    return '' if value is None else str(value)
+
+                lottery_data = {
+                    '期号': str(record['issue']),
+                    '开奖日期': str(record.get('openTime', '')).split(' ')[0],
+                    '前区号码': ' '.join(str(record.get('frontWinningNum', '')).split()),
+                    '后区号码': ' '.join(str(record.get('backWinningNum', '')).split()),
+                    '销售额': str(record.get('saleMoney', '')),
+                    '一等奖注数': award(first, 'baseBetWinner', 'awardNum'),
+                    '一等奖单注奖金': award(first, 'baseBetWinner', 'awardMoney'),
+                    '一等奖追加注数': award(first, 'addToBetWinner', 'awardNum'),
+                    '一等奖追加单注奖金': award(first, 'addToBetWinner', 'awardMoney'),
+                    '二等奖注数': award(second, 'baseBetWinner', 'awardNum'),
+                    '二等奖单注奖金': award(second, 'baseBetWinner', 'awardMoney'),
+                    '二等奖追加注数': award(second, 'addToBetWinner', 'awardNum'),
+                    '二等奖追加单注奖金': award(second, 'addToBetWinner', 'awardMoney'),
+                    '奖池金额': str(record.get('prizePoolMoney', ''))
+                }
+                all_data.append(lottery_data)
+
+            except Exception as e:
+                print(f"解析接口数据时出错: {e}")
+                continue
+
+        # 按期号排序，确保数据顺序正确
+        if all_data:
+            all_data.sort(key=lambda x: int(x['期号']), reverse=True)
+
+        return all_data
+
+    def parse_lottery_data(self, html_content_list, parser=None, verbose=True):
+        """解析开奖数据，parser可选selectolax/lxml/bs4，默认自动选择最快的可用后端"""
+        all_data = []
+        extract_rows = PARSER_BACKENDS[select_parser(parser or self.parser)]
+
         # 如果传入的是单个HTML内容，转换为列表
         if isinstance(html_content_list, str):
             html_content_list = [html_content_list]
 
         for page_num, html_content in enumerate(html_content_list, 1):
-            print(f"正在解析第 {page_num} 页数据...")
+            if verbose:
+                print(f"正在解析第 {page_num} 页数据...")
 
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 查找包含开奖数据的表格及其tbody部分
+            status, rows = extract_rows(html_content)
 
-            # 查找包含开奖数据的表格
-            table = soup.find('table')
-
-            if not table:
+            if status == 'no_table':
                 print(f"第 {page_num} 页未找到数据表格")
                 continue
-
-            # 查找表格的tbody部分
-            tbody = table.find('tbody')
-            if not tbody:
+            if status == 'no_tbody':
                 print(f"第 {page_num} 页未找到表格数据")
                 continue
 
             # 解析每一行数据
-            rows = tbody.find_all('tr')
-
             for row in rows:
                 try:
-                    cells = row.find_all('td')
-                    if len(cells) < 14:  # 确保有足够的列
+                    if row is None:  # 确保有足够的列
                         continue
+                    texts, front_numbers, back_numbers = row
 
-                    # 提取期号
-                    period = cells[0].get_text(strip=True)
-
-                    # 提取开奖日期
-                    date_text = cells[1].get_text(strip=True)
-                    # 提取日期部分，去掉星期信息
+                    # 提取开奖日期，去掉星期信息
+                    date_text = texts[1]
                     date_match = date_text.split('（')[0] if '（' in date_text else date_text
 
-                    # 提取前区号码
-                    front_numbers = []
-                    front_spans = cells[2].find_all('span', class_='jqh')
-                    for span in front_spans:
-                        front_numbers.append(span.get_text(strip=True))
-
-                    # 提取后区号码
-                    back_numbers = []
-                    back_spans = cells[3].find_all('span', class_='jql')
-                    for span in back_spans:
-                        back_numbers.append(span.get_text(strip=True))
-
-                    # 提取销售额
-                    sales_amount = cells[4].get_text(strip=True)
-
-                    # 提取一等奖信息
-                    first_prize_count = cells[5].get_text(strip=True)
-                    first_prize_amount = cells[6].get_text(strip=True)
-                    first_prize_plus_count = cells[7].get_text(strip=True)
-                    first_prize_plus_amount = cells[8].get_text(strip=True)
-
-                    # 提取二等奖信息
-                    second_prize_count = cells[9].get_text(strip=True)
-                    second_prize_amount = cells[10].get_text(strip=True)
-                    second_prize_plus_count = cells[11].get_text(strip=True)
-                    second_prize_plus_amount = cells[12].get_text(strip=True)
-
-                    # 提取奖池金额
-                    prize_pool = cells[13].get_text(strip=True)
-
                     # 组装数据
                     lottery_data = {
-                        '期号': period,
+                        '期号': texts[0],
                         '开奖日期': date_match,
                         '前区号码': ' '.join(front_numbers),
                         '后区号码': ' '.join(back_numbers),
-                        '销售额': sales_amount,
-                        '一等奖注数': first_prize_count,
-                        '一等奖单注奖金': first_prize_amount,
-                        '一等奖追加注数': first_prize_plus_count,
-                        '一等奖追加单注奖金': first_prize_plus_amount,
-                        '二等奖注数': second_prize_count,
-                        '二等奖单注奖金': second_prize_amount,
-                        '二等奖追加注数': second_prize_plus_count,
-                        '二等奖追加单注奖金': second_prize_plus_amount,
-                        '奖池金额': prize_pool
+                        '销售额': texts[4],
+                        '一等奖注数': texts[5],
+                        '一等奖单注奖金': texts[6],
+                        '一等奖追加注数': texts[7],
+                        '一等奖追加单注奖金': texts[8],
+                        '二等奖注数': texts[9],
+                        '二等奖单注奖金': texts[10],
+                        '二等奖追加注数': texts[11],
+                        '二等奖追加单注奖金': texts[12],
+                        '奖池金额': texts[13]
                     }
 
                     all_data.append(lottery_data)
@@ -222,7 +964,8 @@ class DLTSpider:
                     print(f"解析行数据时出错: {e}")
                     continue
 
-            print(f"第 {page_num} 页解析完成，获得 {len(rows)} 条数据")
+            if verbose:
+                print(f"第 {page_num} 页解析完成，获得 {len(rows)} 条数据")
 
         # 按期号排序，确保数据顺序正确
         if all_data:
@@ -234,15 +977,25 @@ class DLTSpider:
         """爬取指定期数的开奖数据"""
         print("开始获取大乐透开奖数据...")
 
-        # 获取HTML内容
-        html_content_list = self.get_page_data()
+        all_data = []
+        if self.backend == 'http':
+            try:
+                all_data = self.parse_api_data(self.get_api_data(target_periods))
+            except Exception as e:
+                print(f"HTTP接口获取数据失败: {e}")
+            if not all_data:
+                print("HTTP接口未获取到数据，改用浏览器方式获取...")
 
-        if not html_content_list:
-            print("未能获取到数据")
-            return []
+        if not all_data:
+            # 获取HTML内容
+            html_content_list = self.get_page_data()
+
+            if not html_content_list:
+                print("未能获取到数据")
+                return []
 
-        # 解析所有页面的数据
-        all_data = self.parse_lottery_data(html_content_list)
+            # 解析所有页面的数据
+            all_data = self.parse_lottery_data(html_content_list)
 
         if not all_data:
             print("未能解析到开奖数据")
@@ -251,7 +1004,7 @@ class DLTSpider:
         print(f"总共解析到 {len(all_data)} 条开奖数据")
 
         # 过滤2025年7月1日之前的数据
-        cutoff_date = datetime(2025, 7, 1)
+        cutoff_date = CUTOFF_DATE
         filtered_data = []
 
         for data in all_data:
@@ -273,10 +1026,1269 @@ class DLTSpider:
 
         return filtered_data
 
+def lottery_data_to_api_records(lottery_data):
+    """将开奖数据转换为接口记录格式（用于本地测试服务器）"""
+    records = []
+    for data in lottery_data:
+        def winner(level, prefix):
+            return {
+                'awardEtc': level,
+                'baseBetWinner': {'remark': '基本', 'awardNum': str(data.get(f'{prefix}注数', '')),
+                                  'awardMoney': str(data.get(f'{prefix}单注奖金', ''))},
+                'addToBetWinner': {'remark': '追加', 'awardNum': str(data.get(f'{prefix}追加注数', '')),
+                                   'awardMoney': str(data.get(f'{prefix}追加单注奖金', ''))},
+            }
+
+        records.append({
+            'issue': str(data['期号']),
+            'openTime': str(data['开奖日期']).split(' ')[0],
+            'frontWinningNum': str(data['前区号码']),
+            'backWinningNum': str(data['后区号码']),
+            'saleMoney': str(data.get('销售额', '')),
+            'prizePoolMoney': str(data.get('奖池金额', '')),
+            'winnerDetails': [winner('1', '一等奖'), winner('2', '二等奖')],
+        })
+    records.sort(key=lambda x: int(x['issue']), reverse=True)
+    return records
+
+
+def render_lottery_table(records):
+    """将接口记录渲染为与开奖页面相同结构的HTML表格"""
+    rows = []
+    weekdays = ['一', '二', '三', '四', '五', '六', '日']
+    for record in records:
+        try:
+            week = weekdays[datetime.strptime(record['openTime'], '%Y-%m-%d').weekday()]
+        except ValueError:
+            week = ''
+        winners = {item['awardEtc']: item for item in record.get('winnerDetails', [])}
+        prize_cells = []
+        for level in ('1', '2'):
+            detail = winners.get(level, {})
+            for key in ('baseBetWinner', 'addToBetWinner'):
+                prize_cells.append((detail.get(key) or {}).get('awardNum', ''))
+                prize_cells.append((detail.get(key) or {}).get('awardMoney', ''))
+        front = ''.join(f'<span class="jqh">{num}</span>' for num in record['frontWinningNum'].split())
+        back = ''.join(f'<span class="jql">{num}</span>' for num in record['backWinningNum'].split())
+        cells = [record['issue'], f"{record['openTime']}（{week}）", front, back,
+                 record.get('saleMoney', '')] + prize_cells + [record.get('prizePoolMoney', '')]
+        rows.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+    return ('<html><head><meta charset="utf-8"></head><body><table><thead><tr><th>期号</th></tr></thead>'
+            '<tbody>' + '\n'.join(rows) + '</tbody></table></body></html>')
+
+
+def generate_synthetic_experts(n_experts, seed=0):
+    """生成n_experts位随机专家（字段与专家排行接口相同，detail为详情页内容），用于离线测试"""
+    rng = np.random.default_rng(seed)
+    grades = ['特级专家', '高级专家', '中级专家', '初级专家']
+    return [{
+        'expertId': 10000 + i,
+        'name': f'专家{i + 1:03d}',
+        'lottery': int(rng.integers(0, 50)),
+        'follow': int(rng.integers(0, 5000)),
+        'gradeName': grades[int(rng.integers(0, len(grades)))],
+        'rank': i + 1,
+        'norm': int(rng.integers(0, 1000)),
+        'bestRecord': f'{int(rng.integers(1, 8))}中{int(rng.integers(1, 8))}',
+        'goodRecord': f'{int(rng.integers(1, 8))}中{int(rng.integers(1, 8))}',
+        'detail': {
+            'experience_years': int(rng.integers(1, 20)),
+            'article_count': int(rng.integers(0, 3000)),
+            'awards': [int(x) for x in rng.integers(0, 10, 3)],
+        },
+    } for i in range(n_experts)]
+
+
+def render_expert_detail(expert):
+    """将专家信息渲染为与专家详情页相同结构的HTML"""
+    detail = expert.get('detail', {})
+    items = ''.join(f'<div class="item">{level}等奖 {count}次</div>'
+                    for level, count in zip('一二三', detail.get('awards', [])))
+    return ('<html><head><meta charset="utf-8"></head><body>'
+            f'<div class="okami-text"><p>{expert["name"]}</p>'
+            f'<p>彩龄：{detail.get("experience_years", 0)}年</p>'
+            f'<p>文章数量：{detail.get("article_count", 0)}篇</p></div>'
+            f'<div class="djzj"><span class="text-head-bg">双色球大奖战绩</span>{items}</div>'
+            '</body></html>')
+
+
+class _FixtureRequestHandler(BaseHTTPRequestHandler):
+    """本地测试服务器的请求处理器，模拟开奖接口和开奖页面"""
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        records = self.server.records
+        if self.server.delay:
+            # 模拟真实站点的响应延迟
+            time.sleep(self.server.delay)
+
+        if parsed.path.endswith('client_json.php'):
+            issue_count = int(query.get('issueCount') or len(records))
+            page_size = int(query.get('pageSize') or 30)
+            page_num = int(query.get('pageNum') or 1)
+            selected = records[:issue_count]
+            pages = max(1, -(-len(selected) // page_size))
+            payload = {
+                'resCode': '000000',
+                'message': '查询成功',
+                'total': len(selected),
+                'pages': pages,
+                'pageNum': page_num,
+                'pageSize': page_size,
+                'data': selected[(page_num - 1) * page_size:page_num * page_size],
+            }
+            body = f"{query.get('callback', 'jQuery')}({json.dumps(payload, ensure_ascii=False)})"
+            self._send(body, 'application/javascript')
+        elif parsed.path.startswith('/kjxx/dlt'):
+            page_size = int(query.get('pageSize') or 30)
+            page_num = int(query.get('pageNum') or 1)
+            self._send(render_lottery_table(records[(page_num - 1) * page_size:page_num * page_size]), 'text/html')
+        elif parsed.path.endswith('rankingList'):
+            limit = int(query.get('limit') or 30)
+            page = int(query.get('page') or 1)
+            experts = [{key: value for key, value in expert.items() if key != 'detail'}
+                       for expert in self.server.experts[(page - 1) * limit:page * limit]]
+            self._send(json.dumps({'code': 0, 'data': experts}, ensure_ascii=False), 'application/json')
+        elif parsed.path.startswith('/expertItem'):
+            expert = next((item for item in self.server.experts
+                           if str(item['expertId']) == query.get('id')), None)
+            if expert is None:
+                self.send_error(404)
+            else:
+                self._send(render_expert_detail(expert), 'text/html')
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        data = body.encode('utf-8')
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DLTFixtureServer:
+    """本地开奖数据测试服务器，用于离线测试HTTP爬取流程（也提供专家排行和专家详情页）"""
+
+    def __init__(self, lottery_data, host='127.0.0.1', port=0, experts=None, delay=0):
+        self.httpd = ThreadingHTTPServer((host, port), _FixtureRequestHandler)
+        self.httpd.records = lottery_data_to_api_records(lottery_data)
+        self.httpd.experts = experts if experts is not None else generate_synthetic_experts(30)
+        self.httpd.delay = delay
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/port/client_json.php"
+
+    @property
+    def expert_list_url(self):
+        return f"{self.base_url}/expert/rankingList?limit=30&page=1"
+
+    @property
+    def expert_ranking_url(self):
+        return f"{self.base_url}/expert/rankingList"
+
+    @property
+    def expert_detail_url(self):
+        return f"{self.base_url}/expertItem?id={{}}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def shift_done_pages(done, shift, page_size, total):
+    """开奖列表前面新增shift期后，返回内容仍全部位于旧的已完成页面中的新页码"""
+    done = set(done)
+    pages = -(-total // page_size)
+    shifted = []
+    for page in range(1, pages + 1):
+        # 新位置j对应旧位置j-shift，新增的期号没有旧位置
+        old_start = (page - 1) * page_size - shift
+        old_stop = min(page * page_size, total) - shift
+        if old_start >= 0 and all(old_page in done for old_page in
+                                  range(old_start // page_size + 1, (old_stop - 1) // page_size + 2)):
+            shifted.append(page)
+    return shifted
+
+
+def merge_lottery_data(existing_data, new_data):
+    """合并新旧开奖数据，按期号去重（新数据优先）并按期号倒序排列"""
+    df = pd.concat([pd.DataFrame(new_data), pd.DataFrame(existing_data)], ignore_index=True)
+    if df.empty:
+        return df
+    df['期号'] = df['期号'].astype(str).str.strip()
+    df = df.drop_duplicates(subset='期号', keep='first')
+    df = df.iloc[df['期号'].astype(int).argsort()[::-1]].reset_index(drop=True)
+    return df
+
+
+def update_lottery_data(spider, filename='大乐透开奖数据.csv'):
+    """增量更新本地开奖数据文件，返回合并后的开奖记录"""
+    existing_df = pd.read_csv(filename, encoding='utf-8-sig', dtype={'期号': str})
+    latest_period = int(existing_df['期号'].astype(int).max())
+    print(f"本地最新期号：{latest_period}")
+
+    new_data = spider.crawl_new_draws(latest_period)
+    if not new_data:
+        print("没有新的开奖数据")
+        return existing_df.to_dict('records')
+
+    merged_df = merge_lottery_data(existing_df, new_data)
+    merged_df.to_csv(filename, index=False, encoding='utf-8-sig')
+    print(f"新增{len(merged_df) - len(existing_df)}期开奖数据，已更新：{filename}")
+    return merged_df.to_dict('records')
+
+
+# 开奖数据存储中的金额列（int64，单位元）和注数列（int32）
+MONEY_COLUMNS = ['销售额', '一等奖单注奖金', '一等奖追加单注奖金', '二等奖单注奖金', '二等奖追加单注奖金', '奖池金额']
+COUNT_COLUMNS = ['一等奖注数', '一等奖追加注数', '二等奖注数', '二等奖追加注数']
+# 与CSV列顺序一致的全部开奖字段
+LOTTERY_COLUMNS = ['期号', '开奖日期', '前区号码', '后区号码', '销售额',
+                   '一等奖注数', '一等奖单注奖金', '一等奖追加注数', '一等奖追加单注奖金',
+                   '二等奖注数', '二等奖单注奖金', '二等奖追加注数', '二等奖追加单注奖金', '奖池金额']
+
+
+class ColumnStore:
+    """类型化的列存储目录：每列一个.npy文件，加载时内存映射（不解析、不复制），meta.json记录列名、内容摘要和数据来源"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _meta_file(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def exists(self):
+        return os.path.exists(self._meta_file())
+
+    def meta(self):
+        with open(self._meta_file(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_meta(self, meta):
+        tmp_file = self._meta_file() + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_file, self._meta_file())
+
+    def update_meta(self, **values):
+        """在meta.json中记录附加信息（如断点进度），不改动数据"""
+        meta = self.meta()
+        meta.update(values)
+        self._write_meta(meta)
+
+    @staticmethod
+    def digest(arrays):
+        sha = hashlib.sha1()
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            sha.update(f"{name}|{values.dtype.str}|{values.shape}".encode('utf-8'))
+            sha.update(values.tobytes())
+        return sha.hexdigest()
+
+    def save(self, arrays, source=None):
+        """写入列数组；内容与已保存的相同时跳过写入，返回是否写入了数据"""
+        digest = self.digest(arrays)
+        if self.exists():
+            meta = self.meta()
+            if meta.get('digest') == digest:
+                if meta.get('source') != source:
+                    meta['source'] = source
+                    self._write_meta(meta)
+                return False
+
+        self.clear()
+        os.makedirs(self.path, exist_ok=True)
+        for i, values in enumerate(arrays.values()):
+            np.save(os.path.join(self.path, f"{i}.npy"), np.ascontiguousarray(values))
+        # meta.json最后写入，写入中断时旧的meta与数据不会被误用
+        self._write_meta({'columns': list(arrays), 'digest': digest, 'rows': len(next(iter(arrays.values()), [])),
+                          'source': source})
+        return True
+
+    def append(self, arrays):
+        """追加一批行，作为新的数据块写入，不读取已有数据"""
+        if not self.exists():
+            return self.save(arrays)
+        meta = self.meta()
+        chunk = meta.get('chunks', 1)
+        for i, name in enumerate(meta['columns']):
+            np.save(os.path.join(self.path, f"{i}.{chunk}.npy"), np.ascontiguousarray(arrays[name]))
+        meta['chunks'] = chunk + 1
+        meta['rows'] += len(next(iter(arrays.values())))
+        meta['digest'] = hashlib.sha1((meta['digest'] + self.digest(arrays)).encode('utf-8')).hexdigest()
+        self._write_meta(meta)
+        return True
+
+    def load(self, mmap=True):
+        """返回 列名 -> 数组，mmap为True时以只读内存映射方式打开（多个数据块时合并为普通数组）"""
+        meta = self.meta()
+        mode = 'r' if mmap else None
+        columns = {}
+        for i, name in enumerate(meta['columns']):
+            values = np.load(os.path.join(self.path, f"{i}.npy"), mmap_mode=mode)
+            if meta.get('chunks', 1) > 1:
+                values = np.concatenate([values] + [np.load(os.path.join(self.path, f"{i}.{chunk}.npy"))
+                                                    for chunk in range(1, meta['chunks'])])
+            columns[name] = values
+        return columns
+
+    def iter_chunks(self, mmap=True):
+        """按写入顺序逐块产出 列名 -> 数组，不合并数据块，内存中只保留一块"""
+        meta = self.meta()
+        mode = 'r' if mmap else None
+        for chunk in range(meta.get('chunks', 1)):
+            suffix = '' if chunk == 0 else f".{chunk}"
+            yield {name: np.load(os.path.join(self.path, f"{i}{suffix}.npy"), mmap_mode=mode)
+                   for i, name in enumerate(meta['columns'])}
+
+    def clear(self):
+        """删除存储目录中的全部数据"""
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith('.npy') or name == 'meta.json':
+                    os.remove(os.path.join(self.path, name))
+
+
+def file_signature(filename):
+    """文件的(大小, 修改时间)，用于判断存储是否由该文件的当前版本生成"""
+    if not os.path.exists(filename):
+        return None
+    stat = os.stat(filename)
+    return {'file': os.path.basename(filename), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def lottery_arrays(lottery_data):
+    """将开奖记录（字符串字段）一次性转换为类型化的列数组：号码为uint8矩阵，金额int64，日期datetime64，
+    期号保存为定长字符串以保留前导零（如07001）；行统一按期号倒序排列，来源顺序不同的相同数据得到相同的数组"""
+    df = pd.DataFrame(lottery_data)
+    issues = pd.to_numeric(df['期号'], errors='coerce').to_numpy()
+    df = df.iloc[np.argsort(-issues, kind='stable')].reset_index(drop=True)
+    front, back, _ = build_draw_matrices(df['前区号码'], df['后区号码'])
+    arrays = {
+        '期号': df['期号'].astype(str).str.strip().to_numpy().astype(str),
+        '开奖日期': pd.to_datetime(df['开奖日期'], errors='coerce').to_numpy().astype('datetime64[D]'),
+        '前区': front,
+        '后区': back,
+    }
+    for column in MONEY_COLUMNS:
+        arrays[column] = parse_money(df[column].to_numpy())
+    for column in COUNT_COLUMNS:
+        arrays[column] = parse_money(df[column].to_numpy()).astype(np.int32)
+    return arrays
+
+
+def format_numbers(matrix):
+    """号码矩阵转换为"01 02 03"形式的字符串列表"""
+    labels = np.array([f"{num:02d}" for num in range(max(FRONT_MAX, BACK_MAX) + 1)])
+    return [' '.join(row) for row in labels[np.asarray(matrix, dtype=np.intp)]]
+
+
+def row_selection(rows):
+    """行号为连续的升序或降序序列时转换为切片，取出的是视图而不是副本"""
+    if isinstance(rows, slice):
+        return rows
+    rows = np.asarray(rows)
+    if len(rows) > 1 and abs(int(rows[1]) - int(rows[0])) == 1:
+        step = int(rows[1]) - int(rows[0])
+        if np.all(np.diff(rows) == step):
+            stop = int(rows[-1]) + step
+            return slice(int(rows[0]), stop if stop >= 0 else None, step)
+    return rows
+
+
+def lottery_frame(arrays, rows=None, numbers=True):
+    """由类型化列数组构造与CSV字段相同的DataFrame，rows为选取（并排序）的行号；
+    数值列直接引用数组（连续行为视图，不复制），numbers为False时不生成前区/后区号码字符串列"""
+    rows = slice(None) if rows is None else row_selection(rows)
+    columns = {
+        '期号': arrays['期号'][rows],
+        '开奖日期': pd.to_datetime(arrays['开奖日期'][rows]),
+    }
+    if numbers:
+        columns['前区号码'] = format_numbers(arrays['前区'][rows])
+        columns['后区号码'] = format_numbers(arrays['后区'][rows])
+    for column in MONEY_COLUMNS + COUNT_COLUMNS:
+        columns[column] = arrays[column][rows]
+    return pd.DataFrame({column: columns[column] for column in LOTTERY_COLUMNS if column in columns}, copy=False)
+
+
+def load_lottery_store(store, csv_file):
+    """优先从列存储加载开奖数据；存储不存在或CSV已更新时由CSV重建，返回列数组（无数据时返回None）"""
+    source = file_signature(csv_file)
+    if store.exists() and (source is None or store.meta().get('source') == source):
+        arrays = store.load()
+        # 旧版本的存储把期号保存为整数，丢失了前导零，需要由CSV重建
+        if arrays['期号'].dtype.kind == 'U' or source is None:
+            print(f"从数据存储加载数据成功，共{len(arrays['期号'])}条记录")
+            return arrays
+    if source is None:
+        return None
+
+    df = pd.read_csv(csv_file, encoding='utf-8-sig', dtype=str)
+    if df.empty:
+        return None
+    print(f"从CSV文件加载数据成功，共{len(df)}条记录")
+    arrays = lottery_arrays(df.to_dict('records'))
+    if store.save(arrays, source):
+        print(f"已写入数据存储：{store.path}")
+    return arrays
+
+
+def frame_arrays(df, dtypes):
+    """DataFrame转换为列数组：dtypes中的列按指定类型保存，其余列保存为定长Unicode字符串"""
+    arrays = {}
+    for column in df.columns:
+        if column in dtypes:
+            arrays[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy().astype(dtypes[column])
+        else:
+            arrays[column] = df[column].fillna('').astype(str).to_numpy().astype(str)
+    return arrays
+
+
+# 专家数据的数值列类型，其余列为字符串
+EXPERT_COLUMN_TYPES = {
+    'expert_id': np.int64, 'lottery': np.int32, 'follow': np.int32, 'rank': np.int32, 'norm': np.int32,
+    'experience_years': np.int16, 'article_count': np.int32, 'total_awards': np.int32, 'issue_num': np.int16,
+}
+
+
+# 前区号码1-35，后区号码1-12；one-hot矩阵前35列为前区，后12列为后区
+FRONT_MAX = 35
+BACK_MAX = 12
+FRONT_PICK = 5
+BACK_PICK = 2
+
+
+def build_draw_matrices(front_series, back_series):
+    """将号码字符串列转换为(N,5)前区、(N,2)后区uint8矩阵和(N,47)的one-hot布尔矩阵"""
+    n = len(front_series)
+    front = np.array(' '.join(front_series.astype(str)).split(), dtype=np.uint8).reshape(n, FRONT_PICK)
+    back = np.array(' '.join(back_series.astype(str)).split(), dtype=np.uint8).reshape(n, BACK_PICK)
+    return front, back, build_onehot(front, back)
+
+
+def build_onehot(front, back):
+    """由前区、后区号码矩阵构造(N,47)的one-hot布尔矩阵"""
+    n = len(front)
+    onehot = np.zeros((n, FRONT_MAX + BACK_MAX), dtype=bool)
+    rows = np.arange(n)[:, None]
+    onehot[rows, front.astype(np.intp) - 1] = True
+    onehot[rows, FRONT_MAX + back.astype(np.intp) - 1] = True
+    return onehot
+
+
+# 每个字节的二进制1的个数，用于不支持np.bitwise_count的NumPy版本
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def encode_masks(number_matrix, dtype=np.uint64):
+    """将号码矩阵（每行一注）编码为位掩码，号码n对应第n-1位；前区用uint64，后区用uint16"""
+    numbers = np.asarray(number_matrix, dtype=np.uint64)
+    if numbers.ndim == 1:
+        numbers = numbers[None, :]
+    bits = np.left_shift(np.uint64(1), numbers - np.uint64(1))
+    return np.bitwise_or.reduce(bits, axis=1).astype(dtype)
+
+
+def decode_mask(mask, max_number=FRONT_MAX):
+    """将位掩码还原为号码列表"""
+    mask = int(mask)
+    return [num for num in range(1, max_number + 1) if mask >> (num - 1) & 1]
+
+
+def popcount(values):
+    """逐元素统计二进制1的个数"""
+    values = np.asarray(values)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    as_bytes = np.ascontiguousarray(values).view(np.uint8).reshape(values.shape + (values.itemsize,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def overlap_counts(masks_a, masks_b):
+    """两组位掩码逐元素（可广播）的重合号码个数"""
+    return popcount(np.bitwise_and(masks_a, masks_b))
+
+
+def calculate_scores(all_counts, recent_counts, random_scores):
+    """综合评分：历史频率40% + 最近趋势30% + 平衡性20% + 随机因子10%，下标0对应号码1"""
+    all_counts = np.asarray(all_counts, dtype=np.float64)
+    recent_counts = np.asarray(recent_counts, dtype=np.float64)
+    max_num = len(all_counts)
+
+    # 历史频率权重 (40%)
+    total_appearances = all_counts.sum()
+    historical_score = all_counts / total_appearances * 40 if total_appearances > 0 else np.zeros(max_num)
+
+    # 最近趋势权重 (30%)
+    recent_total = recent_counts.sum()
+    recent_score = recent_counts / recent_total * 30 if recent_total > 0 else np.zeros(max_num)
+
+    # 平衡性权重 (20%)
+    avg_freq = total_appearances / max_num if total_appearances > 0 else 0
+    balance_score = np.maximum(0, 20 - np.abs(all_counts - avg_freq) * 2)
+
+    # 随机因子 (10%)
+    return historical_score + recent_score + balance_score + random_scores
+
+
+def rank_numbers(scores):
+    """按得分从高到低返回号码（同分时号码小的在前）"""
+    return np.argsort(-np.asarray(scores), kind='stable') + 1
+
+
+def select_balanced_front(ranked_numbers):
+    """按得分顺序选出5个前区号码，奇偶和大小号都控制在2-3个"""
+    predicted_front = []
+    odd_count = 0
+    even_count = 0
+    small_count = 0
+    big_count = 0
+
+    for num in ranked_numbers:
+        num = int(num)
+        if len(predicted_front) >= 5:
+            break
+
+        is_odd = num % 2 == 1
+        is_small = num <= 17
+
+        # 控制奇偶比例（建议2-3个奇数）
+        if is_odd and odd_count >= 3:
+            continue
+        if not is_odd and even_count >= 3:
+            continue
+
+        # 控制大小号比例（建议2-3个小号）
+        if is_small and small_count >= 3:
+            continue
+        if not is_small and big_count >= 3:
+            continue
+
+        predicted_front.append(num)
+        if is_odd:
+            odd_count += 1
+        else:
+            even_count += 1
+        if is_small:
+            small_count += 1
+        else:
+            big_count += 1
+
+    # 如果没有足够的号码，补充最高分的号码
+    if len(predicted_front) < 5:
+        for num in ranked_numbers:
+            if int(num) not in predicted_front:
+                predicted_front.append(int(num))
+                if len(predicted_front) >= 5:
+                    break
+
+    return predicted_front
+
+
+def sample_without_replacement(weights, n_rows, k, rng):
+    """按权重不放回地为每行抽取k个号码，返回(n_rows, k)的有序号码矩阵
+
+    使用指数竞争E/w取最小的k个，与Gumbel top-k（log w + Gumbel取最大的k个）等价，
+    但只需生成float32指数随机数。
+    """
+    inverse_weights = (1 / np.maximum(np.asarray(weights, dtype=np.float64), 1e-12)).astype(np.float32)
+    keys = rng.standard_exponential(size=(n_rows, len(inverse_weights)), dtype=np.float32) * inverse_weights
+    top = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    return np.sort(top, axis=1).astype(np.uint8) + 1
+
+
+def generate_tickets(front_scores, back_scores, n_tickets, rng=None, odd_range=(2, 3), small_range=(2, 3),
+                     chunk_size=200000, max_empty_rounds=20):
+    """按号码得分批量生成n_tickets注号码，前区奇数个数和小号个数限制在给定范围内（拒绝采样）；
+    连续max_empty_rounds轮没有任何号码满足约束时抛出ValueError"""
+    rng = rng if rng is not None else np.random.default_rng()
+    front = np.empty((n_tickets, FRONT_PICK), dtype=np.uint8)
+    back = np.empty((n_tickets, BACK_PICK), dtype=np.uint8)
+
+    filled = 0
+    acceptance = 0.5
+    empty_rounds = 0
+    while filled < n_tickets:
+        # 按当前接受率多抽一些，不满足奇偶/大小约束的整行丢弃
+        need = n_tickets - filled
+        size = min(chunk_size, int(need / max(acceptance, 0.01) * 1.1) + 16)
+        candidates = sample_without_replacement(front_scores, size, FRONT_PICK, rng)
+        odd_counts = (candidates % 2 == 1).sum(axis=1)
+        small_counts = (candidates <= 17).sum(axis=1)
+        valid = candidates[(odd_counts >= odd_range[0]) & (odd_counts <= odd_range[1])
+                           & (small_counts >= small_range[0]) & (small_counts <= small_range[1])]
+        acceptance = max(len(valid) / size, 0.01)
+        empty_rounds = 0 if len(valid) else empty_rounds + 1
+        if empty_rounds >= max_empty_rounds:
+            raise ValueError(f"连续{empty_rounds}轮没有生成满足约束的号码（奇数个数{odd_range}，小号个数{small_range}），"
+                             f"请检查约束和号码得分")
+        taken = valid[:need]
+        front[filled:filled + len(taken)] = taken
+        filled += len(taken)
+
+    for begin in range(0, n_tickets, chunk_size):
+        end = min(begin + chunk_size, n_tickets)
+        back[begin:end] = sample_without_replacement(back_scores, end - begin, BACK_PICK, rng)
+
+    return front, back
+
+
+def save_tickets(front, back, filename):
+    """保存批量号码：.npz为压缩数组，其他扩展名保存为CSV"""
+    if filename.endswith('.npz'):
+        np.savez_compressed(filename, front=front, back=back)
+    else:
+        header = ','.join([f'前区{i}' for i in range(1, FRONT_PICK + 1)] + [f'后区{i}' for i in range(1, BACK_PICK + 1)])
+        np.savetxt(filename, np.hstack([front, back]), fmt='%02d', delimiter=',', header=header,
+                   comments='', encoding='utf-8-sig')
+    print(f"已保存{len(front)}注号码到：{filename}")
+
+
+# 组合数表：_BINOM[n, k] = C(n, k)，n <= 35，k <= 5
+_BINOM = np.array([[math.comb(n, k) for k in range(FRONT_PICK + 1)] for n in range(FRONT_MAX + 1)], dtype=np.int64)
+FRONT_COMBINATIONS = math.comb(FRONT_MAX, FRONT_PICK)  # 324,632
+BACK_COMBINATIONS = math.comb(BACK_MAX, BACK_PICK)  # 66
+
+
+def rank_combinations(number_matrix):
+    """组合数系统排名：将每行升序号码映射为[0, C(n,k))内的整数编号"""
+    numbers = np.sort(np.asarray(number_matrix, dtype=np.intp), axis=1) - 1
+    ranks = np.zeros(len(numbers), dtype=np.int64)
+    for i in range(numbers.shape[1]):
+        ranks += _BINOM[numbers[:, i], i + 1]
+    return ranks
+
+
+def unrank_combinations(ranks, k=FRONT_PICK):
+    """rank_combinations的逆运算：将编号还原为(N, k)的升序号码矩阵"""
+    remaining = np.array(ranks, dtype=np.int64).ravel()
+    numbers = np.empty((len(remaining), k), dtype=np.uint8)
+    for i in range(k, 0, -1):
+        # 找出满足C(a, i) <= rank的最大a
+        a = np.searchsorted(_BINOM[:, i], remaining, side='right') - 1
+        numbers[:, i - 1] = a + 1
+        remaining -= _BINOM[a, i]
+    return numbers
+
+
+def ticket_ids(front, back):
+    """将一注号码（前区5个+后区2个）映射为[0, 324632*66)内的唯一编号"""
+    return rank_combinations(front) * BACK_COMBINATIONS + rank_combinations(back)
+
+
+def tickets_from_ids(ids):
+    """ticket_ids的逆运算，返回(前区矩阵, 后区矩阵)"""
+    front_ranks, back_ranks = np.divmod(np.asarray(ids, dtype=np.int64), BACK_COMBINATIONS)
+    return unrank_combinations(front_ranks, FRONT_PICK), unrank_combinations(back_ranks, BACK_PICK)
+
+
+# 前区组合特征表的字段
+COMBINATION_FEATURES = np.dtype([('sum', np.uint8), ('span', np.uint8), ('odd', np.uint8), ('small', np.uint8)])
+
+
+def build_combination_table(filename='dlt_front_combinations.npy'):
+    """预先计算全部前区组合的和值、跨度、奇数个数、小号个数，按编号顺序保存为.npy文件"""
+    numbers = unrank_combinations(np.arange(FRONT_COMBINATIONS), FRONT_PICK)
+    table = np.empty(FRONT_COMBINATIONS, dtype=COMBINATION_FEATURES)
+    table['sum'] = numbers.sum(axis=1, dtype=np.uint16)
+    table['span'] = numbers[:, -1] - numbers[:, 0]
+    table['odd'] = (numbers % 2 == 1).sum(axis=1)
+    table['small'] = (numbers <= 17).sum(axis=1)
+    np.save(filename, table)
+    return filename
+
+
+class CombinationIndex:
+    """前区全部组合的特征索引，筛选条件都以数组掩码完成"""
+
+    def __init__(self, front_matrix=None, filename='dlt_front_combinations.npy'):
+        if not os.path.exists(filename):
+            build_combination_table(filename)
+        # 静态特征表按内存映射只读打开，不会整体读入内存
+        self.table = np.load(filename, mmap_mode='r')
+        # 历史开出次数随开奖数据变化，单独按编号计数
+        if front_matrix is None or len(front_matrix) == 0:
+            self.hit_counts = np.zeros(FRONT_COMBINATIONS, dtype=np.uint16)
+        else:
+            self.hit_counts = np.bincount(rank_combinations(front_matrix),
+                                          minlength=FRONT_COMBINATIONS).astype(np.uint16)
+
+    def mask(self, odd=None, small=None, sum_range=None, span_range=None, hit_range=None):
+        """按条件筛选组合，范围均为闭区间，返回长度324,632的布尔掩码"""
+        mask = np.ones(FRONT_COMBINATIONS, dtype=bool)
+        if odd is not None:
+            mask &= self.table['odd'] == odd
+        if small is not None:
+            mask &= self.table['small'] == small
+        if sum_range is not None:
+            mask &= (self.table['sum'] >= sum_range[0]) & (self.table['sum'] <= sum_range[1])
+        if span_range is not None:
+            mask &= (self.table['span'] >= span_range[0]) & (self.table['span'] <= span_range[1])
+        if hit_range is not None:
+            mask &= (self.hit_counts >= hit_range[0]) & (self.hit_counts <= hit_range[1])
+        return mask
+
+    def query(self, sort_by=None, descending=False, limit=None, **conditions):
+        """返回满足条件的组合编号，可按sum/span/odd/small/hits排序"""
+        ranks = np.flatnonzero(self.mask(**conditions))
+        if sort_by is not None:
+            values = self.hit_counts[ranks] if sort_by == 'hits' else self.table[sort_by][ranks]
+            order = np.argsort(values, kind='stable')
+            ranks = ranks[order[::-1] if descending else order]
+        return ranks[:limit] if limit is not None else ranks
+
+    def combinations(self, ranks):
+        """将组合编号还原为号码矩阵"""
+        return unrank_combinations(ranks, FRONT_PICK)
+
+
+# 大乐透奖级规则：奖级 -> [(前区命中数, 后区命中数), ...]
+PRIZE_RULES = {
+    1: [(5, 2)],
+    2: [(5, 1)],
+    3: [(5, 0)],
+    4: [(4, 2)],
+    5: [(4, 1)],
+    6: [(3, 2)],
+    7: [(4, 0)],
+    8: [(3, 1), (2, 2)],
+    9: [(3, 0), (1, 2), (2, 1), (0, 2)],
+}
+PRIZE_NAMES = {0: '未中奖', 1: '一等奖', 2: '二等奖', 3: '三等奖', 4: '四等奖', 5: '五等奖',
+               6: '六等奖', 7: '七等奖', 8: '八等奖', 9: '九等奖'}
+# 按[前区命中数, 后区命中数]查奖级，0表示未中奖
+PRIZE_TIER_TABLE = np.zeros((FRONT_PICK + 1, BACK_PICK + 1), dtype=np.uint8)
+for _tier, _hits in PRIZE_RULES.items():
+    for _front_hits, _back_hits in _hits:
+        PRIZE_TIER_TABLE[_front_hits, _back_hits] = _tier
+
+# 三至九等奖为固定奖金（元），一、二等奖为浮动奖金，取自每期开奖数据
+FIXED_PRIZES = {3: 10000, 4: 3000, 5: 300, 6: 200, 7: 100, 8: 15, 9: 5}
+# 每注投注金额（元），追加投注每注另加1元，只有一、二等奖有追加奖金
+TICKET_PRICE = 2
+ADDITIONAL_PRICE = 1
+
+
+def parse_money(values):
+    """清理金额列（去掉逗号、元等字符），无法解析的记为0，返回int64数组"""
+    cleaned = pd.Series(values).astype(str).str.replace(r'[^\d.]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0).to_numpy().astype(np.int64)
+
+
+def prize_amounts(first_prize, second_prize, first_additional=0, second_additional=0, additional=False):
+    """返回按奖级索引的单注奖金数组，下标0为未中奖；additional为True时加上一、二等奖的追加奖金"""
+    amounts = np.zeros(len(PRIZE_NAMES), dtype=np.int64)
+    amounts[1] = first_prize + (first_additional if additional else 0)
+    amounts[2] = second_prize + (second_additional if additional else 0)
+    for tier, amount in FIXED_PRIZES.items():
+        amounts[tier] = amount
+    return amounts
+
+
+def check_prizes(front, back, draw_front, draw_back):
+    """返回每注号码相对于一期开奖的奖级（uint8，0为未中奖）"""
+    # 用查找表代替集合求交：号码被开出则为1，按号码取值后求和即命中个数
+    front_lookup = np.zeros(FRONT_MAX + 1, dtype=np.uint8)
+    front_lookup[np.asarray(draw_front, dtype=np.intp)] = 1
+    back_lookup = np.zeros(BACK_MAX + 1, dtype=np.uint8)
+    back_lookup[np.asarray(draw_back, dtype=np.intp)] = 1
+    front_hits = front_lookup[front].sum(axis=1, dtype=np.uint8)
+    back_hits = back_lookup[back].sum(axis=1, dtype=np.uint8)
+    return PRIZE_TIER_TABLE[front_hits, back_hits]
+
+
+def count_prizes(front, back, draw_front, draw_back, chunk_size=2_000_000):
+    """统计一批号码在一期开奖中各奖级的中奖注数，返回长度10的数组（下标为奖级）"""
+    counts = np.zeros(len(PRIZE_NAMES), dtype=np.int64)
+    for begin in range(0, len(front), chunk_size):
+        tiers = check_prizes(front[begin:begin + chunk_size], back[begin:begin + chunk_size], draw_front, draw_back)
+        counts += np.bincount(tiers, minlength=len(PRIZE_NAMES))
+    return counts
+
+
+# 多进程兑奖时每个工作进程持有的号码
+_worker_tickets = None
+
+
+def _init_prize_worker(front, back):
+    global _worker_tickets
+    _worker_tickets = (front, back)
+
+
+def _count_prizes_for_draws(draw_fronts, draw_backs):
+    front, back = _worker_tickets
+    return np.array([count_prizes(front, back, draw_front, draw_back)
+                     for draw_front, draw_back in zip(draw_fronts, draw_backs)])
+
+
+def count_prizes_history(front, back, draw_fronts, draw_backs, workers=None):
+    """统计一批号码在多期开奖中各奖级的中奖注数，返回(期数, 10)的数组；workers>1时按期分给多个进程"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(draw_fronts) < 2:
+        _init_prize_worker(front, back)
+        return _count_prizes_for_draws(draw_fronts, draw_backs)
+
+    batches = np.array_split(np.arange(len(draw_fronts)), min(workers, len(draw_fronts)))
+    with ProcessPoolExecutor(max_workers=len(batches), initializer=_init_prize_worker,
+                             initargs=(front, back)) as executor:
+        results = executor.map(_count_prizes_for_draws,
+                               [draw_fronts[batch] for batch in batches],
+                               [draw_backs[batch] for batch in batches])
+        return np.vstack(list(results))
+
+
+def load_tickets(filename):
+    """读取save_tickets保存的号码文件，返回(前区矩阵, 后区矩阵)"""
+    if filename.endswith('.npz'):
+        with np.load(filename) as data:
+            return data['front'], data['back']
+    values = pd.read_csv(filename, encoding='utf-8-sig', dtype=np.uint8).to_numpy()
+    return np.ascontiguousarray(values[:, :FRONT_PICK]), np.ascontiguousarray(values[:, FRONT_PICK:])
+
+
+def generate_synthetic_draws(n_draws, seed=0):
+    """生成n_draws期随机开奖数据（格式与parse_lottery_data相同），用于性能测试"""
+    rng = np.random.default_rng(seed)
+    front = np.sort(rng.random((n_draws, FRONT_MAX)).argsort(axis=1)[:, :FRONT_PICK] + 1, axis=1)
+    back = np.sort(rng.random((n_draws, BACK_MAX)).argsort(axis=1)[:, :BACK_PICK] + 1, axis=1)
+    # 每周一、三、六开奖，从截止日期前最近的周六开始往前排
+    dates = pd.date_range(end=CUTOFF_DATE - pd.Timedelta(days=1), periods=n_draws * 7 // 3 + 7, freq='D')
+    dates = dates[dates.dayofweek.isin([0, 2, 5])][-n_draws:][::-1]
+    sales = rng.integers(200_000_000, 400_000_000, n_draws)
+
+    return [{
+        '期号': str(n_draws - i),
+        '开奖日期': dates[i].strftime('%Y-%m-%d'),
+        '前区号码': ' '.join(f"{num:02d}" for num in front[i]),
+        '后区号码': ' '.join(f"{num:02d}" for num in back[i]),
+        '销售额': str(sales[i]),
+        '一等奖注数': '1',
+        '一等奖单注奖金': '10000000',
+        '一等奖追加注数': '0',
+        '一等奖追加单注奖金': '0',
+        '二等奖注数': '50',
+        '二等奖单注奖金': '200000',
+        '二等奖追加注数': '10',
+        '二等奖追加单注奖金': '160000',
+        '奖池金额': '800000000'
+    } for i in range(n_draws)]
+
+
+def cumulative_counts(onehot):
+    """累计次数矩阵：第i行为前i期各号码的出现次数（首行为0），任意窗口[i, j)的次数为第j行减第i行"""
+    onehot = np.asarray(onehot)
+    cumulative = np.zeros((len(onehot) + 1, onehot.shape[1]), dtype=np.int32)
+    np.cumsum(onehot, axis=0, dtype=np.int32, out=cumulative[1:])
+    return cumulative
+
+
+def rolling_counts(cumulative, window):
+    """每期（含本期）最近window期的出现次数，(N, 列数)；前面不足window期时按已有期数统计"""
+    ends = np.arange(1, len(cumulative))
+    return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+
+def rolling_mean(values, window):
+    """用累计和计算的移动平均，与Series.rolling(window).mean()相同，前window-1期为NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    result = np.full(len(values), np.nan)
+    result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+
+def walk_forward_backtest(onehot, start=100, recent_window=20, seed=0):
+    """逐期回测综合评分预测：只用第t期之前的数据预测第t期，并与同样随机数种子下的随机选号对比"""
+    rng = np.random.default_rng(seed)
+    n_draws = len(onehot)
+    start = max(1, min(start, n_draws))
+    # 第t期预测只用前t期：全部历史次数为累计矩阵第t行，最近recent_window期次数为两行之差
+    cumulative = cumulative_counts(onehot)
+    ends = np.arange(start, n_draws)
+    all_counts = cumulative[ends]
+    recent_counts = all_counts - cumulative[np.maximum(ends - recent_window, 0)]
+
+    n_tests = n_draws - start
+    random_scores = rng.uniform(0, 10, (n_tests, FRONT_MAX + BACK_MAX))
+    random_front = np.argsort(rng.random((n_tests, FRONT_MAX)), axis=1)[:, :FRONT_PICK] + 1
+    random_back = np.argsort(rng.random((n_tests, BACK_MAX)), axis=1)[:, :BACK_PICK] + 1
+
+    predicted_front = np.zeros((n_tests, FRONT_PICK), dtype=np.uint8)
+    predicted_back = np.zeros((n_tests, BACK_PICK), dtype=np.uint8)
+    for i in range(n_tests):
+        front_scores = calculate_scores(all_counts[i, :FRONT_MAX], recent_counts[i, :FRONT_MAX],
+                                        random_scores[i, :FRONT_MAX])
+        back_scores = calculate_scores(all_counts[i, FRONT_MAX:], recent_counts[i, FRONT_MAX:],
+                                       random_scores[i, FRONT_MAX:])
+        predicted_front[i] = sorted(select_balanced_front(rank_numbers(front_scores)))
+        predicted_back[i] = np.sort(rank_numbers(back_scores)[:BACK_PICK])
+
+    # 与实际开奖逐期比对
+    actual = onehot[start:]
+    rows = np.arange(n_tests)[:, None]
+
+    def score(front, back):
+        front_hits = actual[rows, front.astype(np.intp) - 1].sum(axis=1)
+        back_hits = actual[rows, FRONT_MAX + back.astype(np.intp) - 1].sum(axis=1)
+        return front_hits, back_hits, PRIZE_TIER_TABLE[front_hits, back_hits]
+
+    front_hits, back_hits, tiers = score(predicted_front, predicted_back)
+    random_front_hits, random_back_hits, random_tiers = score(random_front, random_back)
+
+    return pd.DataFrame({
+        '期序': np.arange(start, n_draws),
+        '推荐前区': [' '.join(f"{num:02d}" for num in row) for row in predicted_front],
+        '推荐后区': [' '.join(f"{num:02d}" for num in row) for row in predicted_back],
+        '前区命中': front_hits,
+        '后区命中': back_hits,
+        '奖级': tiers,
+        '随机前区命中': random_front_hits,
+        '随机后区命中': random_back_hits,
+        '随机奖级': random_tiers,
+    })
+
+
+class FrequencyEngine:
+    """基于号码矩阵的号码频率统计，与绘图代码分离。
+    构造时生成一次累计次数矩阵，任意窗口的频率只需两行相减，多个滚动窗口可一次算出每一期的结果"""
+
+    def __init__(self, front_matrix, back_matrix):
+        self.front_matrix = front_matrix
+        self.back_matrix = back_matrix
+        # (N+1, 47)，前35列为前区，后12列为后区
+        self.cumulative = cumulative_counts(build_onehot(front_matrix, back_matrix))
+
+    def counts(self, start=None, stop=None):
+        """返回第[start, stop)期前区(35,)和后区(12,)号码的出现次数，下标0对应号码1"""
+        start, stop, _ = slice(start, stop).indices(len(self.cumulative) - 1)
+        counts = (self.cumulative[max(start, stop)] - self.cumulative[start]).astype(np.int64)
+        return counts[:FRONT_MAX], counts[FRONT_MAX:]
+
+    def counters(self, start=None, stop=None):
+        """以Counter形式返回出现过的号码及次数"""
+        front, back = self.counts(start, stop)
+        return (Counter({num: int(count) for num, count in enumerate(front, 1) if count}),
+                Counter({num: int(count) for num, count in enumerate(back, 1) if count}))
+
+    def rolling(self, window, area='front'):
+        """每一期（含本期）最近window期各号码的出现次数，前区(N,35)、后区(N,12)"""
+        counts = rolling_counts(self.cumulative, window)
+        return counts[:, :FRONT_MAX] if area == 'front' else counts[:, FRONT_MAX:]
+
+    def rolling_windows(self, windows=(10, 20, 50, 100), area='front'):
+        """多个窗口的滚动出现次数，返回 {窗口: 矩阵}"""
+        return {window: self.rolling(window, area) for window in windows}
+
+
+# 一期前区5个号码中的全部三元组（按列下标）
+TRIPLE_COLUMNS = np.array([(a, b, c) for a in range(FRONT_PICK) for b in range(a + 1, FRONT_PICK)
+                           for c in range(b + 1, FRONT_PICK)], dtype=np.intp)
+FRONT_TRIPLES = math.comb(FRONT_MAX, 3)  # 6,545
+
+
+def pair_counts(number_matrix, size):
+    """号码对同现矩阵X.T@X（X为one-hot），对角线为各号码的出现次数"""
+    onehot = np.zeros((len(number_matrix), size), dtype=np.int32)
+    onehot[np.arange(len(number_matrix))[:, None], np.asarray(number_matrix, dtype=np.intp) - 1] = 1
+    return (onehot.T @ onehot).astype(np.int64)
+
+
+def triple_counts(front_matrix):
+    """前区三元组出现次数，下标为三元组的组合编号（见rank_combinations）"""
+    triples = np.asarray(front_matrix)[:, TRIPLE_COLUMNS].reshape(-1, 3)
+    return np.bincount(rank_combinations(triples), minlength=FRONT_TRIPLES)
+
+
+class CooccurrenceEngine:
+    """号码同现统计：前区35x35、后区12x12号码对矩阵和前区三元组计数。
+    每block期保存一次累计结果，任意窗口[start, stop)只需在两端补算不足block期的开奖；新开奖用append增量更新"""
+
+    def __init__(self, front_matrix, back_matrix, block=64):
+        self.block = block
+        self.front_matrix = np.zeros((0, FRONT_PICK), dtype=np.uint8)
+        self.back_matrix = np.zeros((0, BACK_PICK), dtype=np.uint8)
+        # 全部开奖的累计结果
+        self.front_pairs = np.zeros((FRONT_MAX, FRONT_MAX), dtype=np.int64)
+        self.back_pairs = np.zeros((BACK_MAX, BACK_MAX), dtype=np.int64)
+        self.triples = np.zeros(FRONT_TRIPLES, dtype=np.int64)
+        # 第k个检查点为前k*block期的累计结果
+        self._checkpoints = [(self.front_pairs.copy(), self.back_pairs.copy(), self.triples.copy())]
+        self.append(front_matrix, back_matrix)
+
+    def __len__(self):
+        return len(self.front_matrix)
+
+    def _counts(self, start, stop):
+        front = self.front_matrix[start:stop]
+        return pair_counts(front, FRONT_MAX), pair_counts(self.back_matrix[start:stop], BACK_MAX), triple_counts(front)
+
+    def append(self, front_matrix, back_matrix):
+        """追加新开奖，只统计新增的行"""
+        start = len(self)
+        self.front_matrix = np.concatenate([self.front_matrix, np.asarray(front_matrix, dtype=np.uint8)])
+        self.back_matrix = np.concatenate([self.back_matrix, np.asarray(back_matrix, dtype=np.uint8)])
+        # 按block边界分段累加，每到边界保存检查点
+        while start < len(self):
+            stop = min((start // self.block + 1) * self.block, len(self))
+            front, back, triples = self._counts(start, stop)
+            self.front_pairs += front
+            self.back_pairs += back
+            self.triples += triples
+            if stop % self.block == 0:
+                self._checkpoints.append((self.front_pairs.copy(), self.back_pairs.copy(), self.triples.copy()))
+            start = stop
+
+    def _prefix(self, stop):
+        """前stop期的累计结果"""
+        if stop == len(self):
+            return self.front_pairs, self.back_pairs, self.triples
+        k = stop // self.block
+        base = self._checkpoints[k]
+        extra = self._counts(k * self.block, stop)
+        return tuple(total + part for total, part in zip(base, extra))
+
+    def window(self, start=None, stop=None):
+        """第[start, stop)期（与切片规则相同）的(前区号码对, 后区号码对, 三元组计数)"""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        if start == 0:
+            return self._prefix(stop)
+        return tuple(a - b for a, b in zip(self._prefix(stop), self._prefix(start)))
+
+    def pairs(self, start=None, stop=None, area='front'):
+        front, back, _ = self.window(start, stop)
+        return front if area == 'front' else back
+
+    def partners(self, number, area='front', top=5, start=None, stop=None):
+        """与number同期开出次数最多的号码，返回[(号码, 次数)]；全部历史时只查一行矩阵"""
+        if start is None and stop is None:
+            matrix = self.front_pairs if area == 'front' else self.back_pairs
+        else:
+            matrix = self.pairs(start, stop, area)
+        row = matrix[number - 1].copy()
+        row[number - 1] = -1
+        return [(int(num), int(row[num - 1])) for num in rank_numbers(row)[:top] if row[num - 1] > 0]
+
+    def top_pairs(self, top=10, area='front', start=None, stop=None):
+        """同现次数最多的号码对，返回[((号码a, 号码b), 次数)]"""
+        matrix = self.pairs(start, stop, area)
+        rows, cols = np.triu_indices(len(matrix), k=1)
+        values = matrix[rows, cols]
+        order = np.argsort(-values, kind='stable')[:top]
+        return [((int(rows[i]) + 1, int(cols[i]) + 1), int(values[i])) for i in order if values[i] > 0]
+
+    def top_triples(self, top=10, start=None, stop=None):
+        """出现次数最多的前区三元组，返回[((号码a, 号码b, 号码c), 次数)]"""
+        counts = self.window(start, stop)[2]
+        top = min(top, len(counts))
+        # 只对不少于第top大次数的候选排序，同次数时按号码从小到大
+        threshold = np.partition(counts, len(counts) - top)[len(counts) - top]
+        ids = np.flatnonzero(counts >= max(threshold, 1))
+        numbers = unrank_combinations(ids, 3)
+        order = np.lexsort((numbers[:, 2], numbers[:, 1], numbers[:, 0], -counts[ids]))[:top]
+        return [(tuple(int(num) for num in numbers[i]), int(counts[ids[i]])) for i in order]
+
+
+# 遗漏直方图的格数，最后一格统计遗漏不少于GAP_HISTOGRAM_SIZE-1期的情况
+GAP_HISTOGRAM_SIZE = 40
+
+
+class OmissionEngine:
+    """全部47个号码的遗漏统计（下标0-34为前区1-35，35-46为后区1-12）。
+    遗漏指两次开出之间未开出的期数；当前遗漏为最近一次开出后经过的期数，从未开出时为总期数。
+    由one-hot矩阵一次向量化计算，之后每期新开奖以O(47)更新"""
+
+    def __init__(self, n_numbers=FRONT_MAX + BACK_MAX, histogram_size=GAP_HISTOGRAM_SIZE):
+        self.draws = 0
+        self.last_seen = np.full(n_numbers, -1, dtype=np.int64)
+        self.appearances = np.zeros(n_numbers, dtype=np.int64)
+        # 历次遗漏（含首次开出前的遗漏）中的最大值，不含当前遗漏
+        self.max_gap = np.zeros(n_numbers, dtype=np.int64)
+        # 两次开出之间遗漏的和、次数及直方图
+        self.gap_sum = np.zeros(n_numbers, dtype=np.int64)
+        self.gap_count = np.zeros(n_numbers, dtype=np.int64)
+        self.histogram = np.zeros((n_numbers, histogram_size), dtype=np.int64)
+
+    @classmethod
+    def compute(cls, onehot, histogram_size=GAP_HISTOGRAM_SIZE):
+        """一次遍历one-hot矩阵得到全部号码的遗漏统计"""
+        onehot = np.asarray(onehot, dtype=bool)
+        n_draws, n_numbers = onehot.shape
+        engine = cls(n_numbers, histogram_size)
+        engine.draws = n_draws
+        # 按号码、期数排序的全部开出位置
+        numbers, rows = np.nonzero(onehot.T)
+        engine.appearances = np.bincount(numbers, minlength=n_numbers)
+        seen = engine.appearances > 0
+        ends = np.cumsum(engine.appearances) - 1
+        engine.last_seen[seen] = rows[ends[seen]]
+
+        same = numbers[1:] == numbers[:-1]
+        gaps = (rows[1:] - rows[:-1] - 1)[same]
+        gap_numbers = numbers[1:][same]
+        engine.gap_sum = np.bincount(gap_numbers, weights=gaps, minlength=n_numbers).astype(np.int64)
+        engine.gap_count = np.bincount(gap_numbers, minlength=n_numbers)
+        engine.histogram = np.bincount(gap_numbers * histogram_size + np.minimum(gaps, histogram_size - 1),
+                                       minlength=n_numbers * histogram_size).reshape(n_numbers, histogram_size)
+        np.maximum.at(engine.max_gap, gap_numbers, gaps)
+        # 首次开出前的遗漏
+        first_rows = rows[(ends - engine.appearances + 1)[seen]]
+        engine.max_gap[seen] = np.maximum(engine.max_gap[seen], first_rows)
+        return engine
+
+    def update(self, drawn):
+        """加入一期新开奖，drawn为该期的47位one-hot行"""
+        drawn = np.flatnonzero(drawn)
+        gaps = self.draws - self.last_seen[drawn] - 1
+        between = self.last_seen[drawn] >= 0
+        numbers = drawn[between]
+        self.gap_sum[numbers] += gaps[between]
+        self.gap_count[numbers] += 1
+        self.histogram[numbers, np.minimum(gaps[between], self.histogram.shape[1] - 1)] += 1
+        self.max_gap[drawn] = np.maximum(self.max_gap[drawn], gaps)
+        self.last_seen[drawn] = self.draws
+        self.appearances[drawn] += 1
+        self.draws += 1
+
+    @property
+    def current(self):
+        """当前遗漏"""
+        return self.draws - 1 - self.last_seen
+
+    @property
+    def max_omission(self):
+        """最大遗漏（含当前遗漏）"""
+        return np.maximum(self.max_gap, self.current)
+
+    @property
+    def mean_gap(self):
+        """平均遗漏，只开出过一次或从未开出的号码为NaN"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.gap_count > 0, self.gap_sum / np.maximum(self.gap_count, 1), np.nan)
+
+    def summary(self):
+        """每个号码一行的遗漏统计表"""
+        n_front = min(FRONT_MAX, len(self.last_seen))
+        return pd.DataFrame({
+            '区域': ['前区'] * n_front + ['后区'] * (len(self.last_seen) - n_front),
+            '号码': list(range(1, n_front + 1)) + list(range(1, len(self.last_seen) - n_front + 1)),
+            '出现次数': self.appearances,
+            '当前遗漏': self.current,
+            '最大遗漏': self.max_omission,
+            '平均遗漏': self.mean_gap,
+        })
+
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+
+class WeekdayStatistics:
+    """按开奖日分组的统计结果，各字段均为 {星期: 值} 字典"""
+
+    def __init__(self, days, draw_counts, front_counts, back_counts, odd_counts, small_counts, sales_mean, sales_std):
+        self.days = days
+        self.draw_counts = draw_counts
+        # 号码出现次数，下标0对应号码1
+        self.front_counts = front_counts
+        self.back_counts = back_counts
+        # 奇数个数、小号个数的直方图，下标为个数0-5
+        self.odd_counts = odd_counts
+        self.small_counts = small_counts
+        self.sales_mean = sales_mean
+        self.sales_std = sales_std
+
+    @classmethod
+    def compute(cls, dayofweek, front_matrix, back_matrix, sales, days=tuple(WEEKDAY_NAMES)):
+        """一次遍历号码矩阵，用组号偏移后的bincount得到所有星期的全部统计量"""
+        groups = np.asarray(dayofweek, dtype=np.float64)
+        # 日期无效（NaN）的开奖不参与分组
+        valid = ~np.isnan(groups)
+        groups = groups[valid].astype(np.int64)
+        front_matrix = front_matrix[valid]
+        back_matrix = back_matrix[valid]
+        sales = np.asarray(sales)[valid]
+        n_groups = len(WEEKDAY_NAMES)
+
+        def grouped_bincount(values, size):
+            keys = groups.reshape(-1, *([1] * (values.ndim - 1))) * size + values
+            return np.bincount(keys.ravel(), minlength=n_groups * size).reshape(n_groups, size)
+
+        draw_counts = np.bincount(groups, minlength=n_groups)
+        front = grouped_bincount(front_matrix.astype(np.int64), FRONT_MAX + 1)[:, 1:]
+        back = grouped_bincount(back_matrix.astype(np.int64), BACK_MAX + 1)[:, 1:]
+        odd = grouped_bincount((front_matrix % 2 == 1).sum(axis=1), FRONT_PICK + 1)
+        small = grouped_bincount((front_matrix <= 17).sum(axis=1), FRONT_PICK + 1)
+        sales_stats = pd.Series(sales, dtype=np.float64).groupby(groups).agg(['mean', 'std'])
+
+        present = [day for day in days if draw_counts[WEEKDAY_NAMES.index(day)] > 0]
+        index = {day: WEEKDAY_NAMES.index(day) for day in present}
+        return cls(
+            days=present,
+            draw_counts={day: int(draw_counts[i]) for day, i in index.items()},
+            front_counts={day: front[i] for day, i in index.items()},
+            back_counts={day: back[i] for day, i in index.items()},
+            odd_counts={day: odd[i] for day, i in index.items()},
+            small_counts={day: small[i] for day, i in index.items()},
+            sales_mean={day: sales_stats.loc[i, 'mean'] for day, i in index.items()},
+            sales_std={day: sales_stats.loc[i, 'std'] for day, i in index.items()},
+        )
+
+    def hot_numbers(self, day, area='front', top=5):
+        """返回某开奖日出现次数最多的号码（同次数时号码小的在前）"""
+        counts = self.front_counts[day] if area == 'front' else self.back_counts[day]
+        ranked = rank_numbers(counts)
+        return [int(num) for num in ranked[:top] if counts[num - 1] > 0]
+
+
 class DLTAnalyzer:
-    def __init__(self, data):
-        self.df = pd.DataFrame(data)
-        self.prepare_data()
+    def __init__(self, data, cutoff_date=CUTOFF_DATE):
+        """data为开奖记录列表，或lottery_arrays/ColumnStore得到的类型化列数组（dict）"""
+        self.df = pd.DataFrame() if isinstance(data, dict) else pd.DataFrame(data)
+        self.cutoff_date = cutoff_date
+        # 号码矩阵，与self.df的行一一对应
+        self.front_matrix = np.zeros((0, FRONT_PICK), dtype=np.uint8)
+        self.back_matrix = np.zeros((0, BACK_PICK), dtype=np.uint8)
+        self.onehot = np.zeros((0, FRONT_MAX + BACK_MAX), dtype=bool)
+        self.front_masks = np.zeros(0, dtype=np.uint64)
+        self.back_masks = np.zeros(0, dtype=np.uint16)
+        self.frequency = FrequencyEngine(self.front_matrix, self.back_matrix)
+        self._cooccurrence = None
+        self._omission = None
+        if isinstance(data, dict):
+            self.prepare_arrays(data)
+        else:
+            self.prepare_data()
     
     def prepare_data(self):
         """数据预处理"""
@@ -295,18 +2307,54 @@ class DLTAnalyzer:
         self.df = self.df.sort_values('开奖日期').reset_index(drop=True)
         
         # 过滤掉2025年7月1日之后的数据
-        cutoff_date = datetime(2025, 7, 1)
-        self.df = self.df[self.df['开奖日期'] < cutoff_date]
-        
-        # 添加星期几列
+        if self.cutoff_date is not None:
+            self.df = self.df[self.df['开奖日期'] < self.cutoff_date].reset_index(drop=True)
+
+        # 一次性解析号码，后续分析都直接使用号码矩阵
+        front, back, onehot = build_draw_matrices(self.df['前区号码'], self.df['后区号码'])
+        self.set_draws(front, back, onehot)
+
+    def prepare_arrays(self, arrays):
+        """类型化列数组的预处理，跳过字符串清理和号码解析"""
+        dates = np.asarray(arrays['开奖日期'])
+        if len(dates) == 0:
+            print("数据为空，无法进行分析")
+            return
+
+        # 与prepare_data相同：按日期排序（无效日期排在最后），过滤截止日期之后的开奖
+        rows = np.argsort(dates, kind='stable')
+        if self.cutoff_date is not None:
+            rows = rows[dates[rows] < np.datetime64(self.cutoff_date)]
+        # 号码字符串列只在导出时生成（见save_data），分析直接使用号码矩阵
+        rows = row_selection(rows)
+        self.df = lottery_frame(arrays, rows, numbers=False)
+        front = np.asarray(arrays['前区'][rows])
+        back = np.asarray(arrays['后区'][rows])
+        self.set_draws(front, back, build_onehot(front, back))
+
+    def set_draws(self, front, back, onehot):
+        """设置与self.df逐行对应的号码矩阵，并生成星期列、频率引擎和位掩码"""
         self.df['星期几'] = self.df['开奖日期'].dt.day_name()
         self.df['中文星期'] = self.df['开奖日期'].dt.dayofweek.map({
             0: '周一', 1: '周二', 2: '周三', 3: '周四', 4: '周五', 5: '周六', 6: '周日'
         })
+        self.front_matrix, self.back_matrix, self.onehot = front, back, onehot
+        self.frequency = FrequencyEngine(self.front_matrix, self.back_matrix)
+        self._cooccurrence = None
+        self._omission = None
+        # 每期开奖的位掩码，重合个数即popcount(a & b)
+        self.front_masks = encode_masks(self.front_matrix, np.uint64)
+        self.back_masks = encode_masks(self.back_matrix, np.uint16)
 
         print(f"数据预处理完成，共{len(self.df)}条有效数据")
         print(f"日期范围：{self.df['开奖日期'].min()} 到 {self.df['开奖日期'].max()}")
     
+    def ticket_hits(self, front_numbers, back_numbers):
+        """返回一注号码与每期历史开奖的前区、后区重合个数"""
+        front_mask = encode_masks([front_numbers], np.uint64)[0]
+        back_mask = encode_masks([back_numbers], np.uint16)[0]
+        return overlap_counts(self.front_masks, front_mask), overlap_counts(self.back_masks, back_mask)
+
     def analyze_sales_trend(self):
         """分析销售额变化趋势并预测"""
         if self.df.empty or self.df['销售额'].sum() == 0:
@@ -337,7 +2385,7 @@ class DLTAnalyzer:
         plt.subplot(2, 2, 3)
         window = min(10, len(self.df) // 4)
         if window >= 2:
-            moving_avg = self.df['销售额'].rolling(window=window).mean()
+            moving_avg = rolling_mean(self.df['销售额'], window)
             plt.plot(self.df['开奖日期'], self.df['销售额'], alpha=0.5, label='原始数据')
             plt.plot(self.df['开奖日期'], moving_avg, color='red', linewidth=2, label=f'{window}期移动平均')
             plt.title('销售额移动平均线')
@@ -382,20 +2430,8 @@ class DLTAnalyzer:
             print("数据为空，无法进行号码频率分析")
             return
 
-        # 提取所有前区和后区号码
-        all_front_numbers = []
-        all_back_numbers = []
-
-        for _, row in self.df.iterrows():
-            front_numbers = row['前区号码'].split()
-            back_numbers = row['后区号码'].split()
-
-            all_front_numbers.extend([int(num) for num in front_numbers])
-            all_back_numbers.extend([int(num) for num in back_numbers])
-
         # 计算号码频率
-        front_number_freq = Counter(all_front_numbers)
-        back_number_freq = Counter(all_back_numbers)
+        front_number_freq, back_number_freq = self.frequency.counters()
 
         # 创建完整的前区和后区号码频率统计
         front_freq_complete = {i: front_number_freq.get(i, 0) for i in range(1, 36)}
@@ -465,8 +2501,51 @@ class DLTAnalyzer:
 
         return front_number_freq, back_number_freq
 
-    def predict_lottery_numbers(self):
-        """预测大乐透号码"""
+    def omission(self):
+        """返回号码遗漏统计引擎（第一次调用时计算，之后复用）"""
+        if self._omission is None:
+            self._omission = OmissionEngine.compute(self.onehot)
+        return self._omission
+
+    def analyze_omission(self, top_n=10, plot=True):
+        """号码遗漏分析：当前遗漏、最大遗漏和平均遗漏"""
+        if self.df.empty:
+            print("数据为空，无法进行遗漏分析")
+            return None
+
+        summary = self.omission().summary()
+        front = summary[summary['区域'] == '前区']
+        back = summary[summary['区域'] == '后区']
+
+        if plot:
+            plt.figure(figsize=(20, 10))
+            for i, (area, table) in enumerate([('前区', front), ('后区', back)], 1):
+                plt.subplot(2, 1, i)
+                positions = np.arange(len(table))
+                plt.bar(positions - 0.2, table['当前遗漏'], width=0.4, color='tomato', label='当前遗漏')
+                plt.bar(positions + 0.2, table['最大遗漏'], width=0.4, color='lightgray', label='最大遗漏')
+                plt.plot(positions, table['平均遗漏'], 'b-o', markersize=4, label='平均遗漏')
+                plt.xticks(positions, [f"{num:02d}" for num in table['号码']])
+                plt.title(f'{area}号码遗漏统计')
+                plt.xlabel('号码')
+                plt.ylabel('期数')
+                plt.legend()
+                plt.grid(axis='y', alpha=0.3)
+            plt.tight_layout()
+            plt.show()
+
+        print("\n=== 号码遗漏分析 ===")
+        print(f"分析期数：{len(self.df)}期")
+        for area, table, top in [('前区', front, top_n), ('后区', back, min(top_n, 6))]:
+            coldest = table.sort_values(['当前遗漏', '号码'], ascending=[False, True]).head(top)
+            print(f"\n{area}当前遗漏最多的号码：")
+            for _, row in coldest.iterrows():
+                print(f"  {row['号码']:02d}：当前遗漏{row['当前遗漏']}期，最大遗漏{row['最大遗漏']}期，"
+                      f"平均遗漏{row['平均遗漏']:.1f}期")
+        return summary
+
+    def predict_lottery_numbers(self, recent_window=20):
+        """预测大乐透号码，recent_window为趋势分析使用的最近期数"""
         if self.df.empty:
             print("数据为空，无法进行号码预测")
             return None, None
@@ -474,105 +2553,22 @@ class DLTAnalyzer:
         print("\n=== 智能号码预测 ===")
 
         # 获取历史频率
-        front_freq, back_freq = self.analyze_number_frequency(top_n=15)
-
-        # 最近20期趋势分析
-        recent_df = self.df.tail(20)
-        recent_front_numbers = []
-        recent_back_numbers = []
-
-        for _, row in recent_df.iterrows():
-            front_numbers = row['前区号码'].split()
-            back_numbers = row['后区号码'].split()
-            recent_front_numbers.extend([int(num) for num in front_numbers])
-            recent_back_numbers.extend([int(num) for num in back_numbers])
-
-        recent_front_freq = Counter(recent_front_numbers)
-        recent_back_freq = Counter(recent_back_numbers)
-
-        # 综合评分算法
-        def calculate_score(num, all_freq, recent_freq, is_front=True):
-            max_num = 35 if is_front else 12
-
-            # 历史频率权重 (40%)
-            total_appearances = sum(all_freq.values())
-            historical_score = (all_freq.get(num, 0) / total_appearances) * 40 if total_appearances > 0 else 0
-
-            # 最近趋势权重 (30%)
-            recent_total = sum(recent_freq.values())
-            recent_score = (recent_freq.get(num, 0) / recent_total) * 30 if recent_total > 0 else 0
-
-            # 平衡性权重 (20%)
-            avg_freq = total_appearances / max_num if total_appearances > 0 else 0
-            current_freq = all_freq.get(num, 0)
-            balance_score = 20 - abs(current_freq - avg_freq) * 2
-            balance_score = max(0, balance_score)
-
-            # 随机因子 (10%)
-            random_score = random.uniform(0, 10)
+        front_counts, back_counts = self.frequency.counts()
 
-            return historical_score + recent_score + balance_score + random_score
+        # 最近recent_window期趋势分析
+        recent_front_counts, recent_back_counts = self.frequency.counts(-recent_window)
 
-        # 计算前区号码得分
-        front_scores = {}
-        for num in range(1, 36):
-            score = calculate_score(num, front_freq, recent_front_freq, True)
-            front_scores[num] = score
-
-        # 计算后区号码得分
-        back_scores = {}
-        for num in range(1, 13):
-            score = calculate_score(num, back_freq, recent_back_freq, False)
-            back_scores[num] = score
+        # 综合评分算法（随机因子依次为前区1-35、后区1-12生成）
+        random_scores = np.array([random.uniform(0, 10) for _ in range(FRONT_MAX + BACK_MAX)])
+        front_scores = calculate_scores(front_counts, recent_front_counts, random_scores[:FRONT_MAX])
+        back_scores = calculate_scores(back_counts, recent_back_counts, random_scores[FRONT_MAX:])
 
         # 选择前区号码（确保奇偶和大小号平衡）
-        sorted_front = sorted(front_scores.items(), key=lambda x: x[1], reverse=True)
-
-        predicted_front = []
-        odd_count = 0
-        even_count = 0
-        small_count = 0
-        big_count = 0
-
-        for num, score in sorted_front:
-            if len(predicted_front) >= 5:
-                break
-
-            is_odd = num % 2 == 1
-            is_small = num <= 17
-
-            # 控制奇偶比例（建议2-3个奇数）
-            if is_odd and odd_count >= 3:
-                continue
-            if not is_odd and even_count >= 3:
-                continue
-
-            # 控制大小号比例（建议2-3个小号）
-            if is_small and small_count >= 3:
-                continue
-            if not is_small and big_count >= 3:
-                continue
-
-            predicted_front.append(num)
-            if is_odd:
-                odd_count += 1
-            else:
-                even_count += 1
-            if is_small:
-                small_count += 1
-            else:
-                big_count += 1
-
-        # 如果没有足够的号码，补充最高分的号码
-        if len(predicted_front) < 5:
-            for num, score in sorted_front:
-                if num not in predicted_front:
-                    predicted_front.append(num)
-                    if len(predicted_front) >= 5:
-                        break
+        sorted_front = [(int(num), front_scores[num - 1]) for num in rank_numbers(front_scores)]
+        predicted_front = select_balanced_front([num for num, _ in sorted_front])
 
         # 选择后区号码
-        sorted_back = sorted(back_scores.items(), key=lambda x: x[1], reverse=True)
+        sorted_back = [(int(num), back_scores[num - 1]) for num in rank_numbers(back_scores)]
         predicted_back = [num for num, score in sorted_back[:2]]
 
         # 格式化输出
@@ -605,7 +2601,127 @@ class DLTAnalyzer:
 
         return predicted_front, predicted_back
 
-    def analyze_weekday_patterns(self):
+    def generate_ticket_batch(self, n_tickets, seed=None, filename=None, recent_window=20):
+        """根据综合评分批量生成n_tickets注号码，可指定随机数种子并保存到文件；recent_window为近期热度统计的期数"""
+        if self.df.empty:
+            print("数据为空，无法生成号码")
+            return None, None
+
+        rng = np.random.default_rng(seed)
+        front_counts, back_counts = self.frequency.counts()
+        recent_front_counts, recent_back_counts = self.frequency.counts(-recent_window)
+        random_scores = rng.uniform(0, 10, FRONT_MAX + BACK_MAX)
+        front_scores = calculate_scores(front_counts, recent_front_counts, random_scores[:FRONT_MAX])
+        back_scores = calculate_scores(back_counts, recent_back_counts, random_scores[FRONT_MAX:])
+
+        started = time.perf_counter()
+        front, back = generate_tickets(front_scores, back_scores, n_tickets, rng=rng)
+        print(f"生成{n_tickets}注号码，耗时{time.perf_counter() - started:.2f}秒")
+
+        if filename:
+            save_tickets(front, back, filename)
+        return front, back
+
+    def cooccurrence(self):
+        """返回号码同现统计引擎（第一次调用时创建，之后复用）"""
+        if self._cooccurrence is None:
+            self._cooccurrence = CooccurrenceEngine(self.front_matrix, self.back_matrix)
+        return self._cooccurrence
+
+    def analyze_cooccurrence(self, top_n=10, recent=None):
+        """输出同现次数最多的号码对和三元组；recent为统计最近的期数，默认全部"""
+        if self.df.empty:
+            print("数据为空，无法进行同现分析")
+            return None
+
+        engine = self.cooccurrence()
+        start = -recent if recent else None
+        front_pairs = engine.top_pairs(top_n, 'front', start)
+        back_pairs = engine.top_pairs(min(top_n, 5), 'back', start)
+        triples = engine.top_triples(top_n, start)
+
+        print(f"\n=== 号码同现分析（{'最近' + str(recent) + '期' if recent else '全部历史'}）===")
+        print("前区最常同时开出的号码对：")
+        for (a, b), count in front_pairs:
+            print(f"  {a:02d}-{b:02d}：{count}次")
+        print("后区最常同时开出的号码对：")
+        for (a, b), count in back_pairs:
+            print(f"  {a:02d}-{b:02d}：{count}次")
+        print("前区最常同时开出的三个号码：")
+        for numbers, count in triples:
+            print(f"  {'-'.join(f'{num:02d}' for num in numbers)}：{count}次")
+        return {'front_pairs': front_pairs, 'back_pairs': back_pairs, 'front_triples': triples}
+
+    def combination_index(self, filename='dlt_front_combinations.npy'):
+        """返回带本地历史开出次数的前区组合索引"""
+        return CombinationIndex(self.front_matrix, filename)
+
+    def check_tickets(self, front, back, periods=None, additional=False, workers=None):
+        """按期兑奖：统计一批号码在指定期（默认最新一期）各奖级的中奖注数和奖金"""
+        if self.df.empty:
+            print("数据为空，无法兑奖")
+            return None
+
+        period_values = self.df['期号'].astype(str).to_numpy()
+        if periods is None:
+            selected = np.array([len(self.df) - 1])
+        else:
+            selected = np.flatnonzero(np.isin(period_values, [str(period) for period in periods]))
+            if len(selected) == 0:
+                print("没有找到指定期号的开奖数据")
+                return None
+
+        started = time.perf_counter()
+        counts = count_prizes_history(front, back, self.front_matrix[selected], self.back_matrix[selected], workers)
+        elapsed = time.perf_counter() - started
+
+        # 一、二等奖按每期实际单注奖金计算
+        amounts = np.vstack([prize_amounts(*values, additional=additional) for values in zip(
+            parse_money(self.df['一等奖单注奖金'].to_numpy()[selected]),
+            parse_money(self.df['二等奖单注奖金'].to_numpy()[selected]),
+            parse_money(self.df['一等奖追加单注奖金'].to_numpy()[selected]),
+            parse_money(self.df['二等奖追加单注奖金'].to_numpy()[selected]))])
+
+        result = pd.DataFrame(counts[:, 1:], columns=[PRIZE_NAMES[tier] for tier in range(1, len(PRIZE_NAMES))])
+        result.insert(0, '期号', period_values[selected])
+        result['中奖注数'] = counts[:, 1:].sum(axis=1)
+        result['奖金合计'] = (counts * amounts).sum(axis=1)
+        result['投注金额'] = len(front) * (TICKET_PRICE + (ADDITIONAL_PRICE if additional else 0))
+
+        print(f"\n=== 兑奖结果：{len(front)}注 × {len(selected)}期，耗时{elapsed:.2f}秒 ===")
+        if len(result) == 1:
+            for tier in range(1, len(PRIZE_NAMES)):
+                print(f"{PRIZE_NAMES[tier]}：{counts[0, tier]}注")
+        print(f"中奖注数合计：{result['中奖注数'].sum()}")
+        print(f"奖金合计：{result['奖金合计'].sum()}元，投注金额：{result['投注金额'].sum()}元")
+        return result
+
+    def backtest_predictions(self, start=100, recent_window=20, seed=0):
+        """逐期回测综合评分预测算法，与随机选号比较各奖级的中奖次数"""
+        if len(self.df) <= start:
+            print(f"数据不足{start + 1}期，无法进行回测")
+            return None
+
+        started = time.perf_counter()
+        result = walk_forward_backtest(self.onehot, start=start, recent_window=recent_window, seed=seed)
+        result.insert(0, '期号', self.df['期号'].to_numpy()[start:])
+        elapsed = time.perf_counter() - started
+
+        print(f"\n=== 预测算法回测（第{start + 1}期起，共{len(result)}期，种子{seed}，耗时{elapsed:.2f}秒） ===")
+        print(f"{'奖级':<8}{'综合评分':>10}{'随机选号':>10}")
+        for tier in range(1, 10):
+            print(f"{PRIZE_NAMES[tier]:<8}{(result['奖级'] == tier).sum():>10}{(result['随机奖级'] == tier).sum():>10}")
+        print(f"{'中奖率':<8}{(result['奖级'] > 0).mean():>10.2%}{(result['随机奖级'] > 0).mean():>10.2%}")
+        print(f"前区平均命中：综合评分 {result['前区命中'].mean():.3f}，随机 {result['随机前区命中'].mean():.3f}")
+        print(f"后区平均命中：综合评分 {result['后区命中'].mean():.3f}，随机 {result['随机后区命中'].mean():.3f}")
+        return result
+
+    def weekday_statistics(self, days=('周一', '周三', '周六')):
+        """按开奖日分组统计号码频率、奇偶/大小形态和销售额，不绘图"""
+        return WeekdayStatistics.compute(self.df['开奖日期'].dt.dayofweek.to_numpy(), self.front_matrix,
+                                         self.back_matrix, self.df['销售额'].to_numpy(), days)
+
+    def analyze_weekday_patterns(self, plot=True):
         """分析不同开奖日的号码分布和销售额特征"""
         if self.df.empty:
             print("数据为空，无法进行分析")
@@ -613,156 +2729,89 @@ class DLTAnalyzer:
 
         print("\n=== 不同开奖日分析 ===")
 
-        # 筛选周一、周三、周六的数据
+        # 筛选周一、周三、周六的数据，一次分组计算全部统计量
         target_days = ['周一', '周三', '周六']
-        weekday_data = {}
-
-        for day in target_days:
-            day_df = self.df[self.df['中文星期'] == day]
-            if not day_df.empty:
-                weekday_data[day] = day_df
+        stats = self.weekday_statistics(target_days)
 
-        if not weekday_data:
+        if not stats.days:
             print("没有找到周一、周三、周六的开奖数据")
             return
 
+        if plot:
+            self.plot_weekday_patterns(stats, target_days)
+
+        # 打印详细统计信息
+        print("=== 不同开奖日统计对比 ===")
+        for day in stats.days:
+            print(f"\n{day}开奖（{stats.draw_counts[day]}期）：")
+            print(f"  平均销售额：{stats.sales_mean[day]:.2f}元")
+            print(f"  销售额标准差：{stats.sales_std[day]:.2f}元")
+
+            # 前区、后区热门号码
+            print(f"  前区热门号码：{', '.join(map(str, stats.hot_numbers(day, 'front', 5)))}")
+            print(f"  后区热门号码：{', '.join(map(str, stats.hot_numbers(day, 'back', 3)))}")
+
+        return stats
+
+    def plot_weekday_patterns(self, stats, target_days):
+        """绘制不同开奖日的对比图表"""
+        day_labels = {day: f"{day}({stats.draw_counts.get(day, 0)}期)" for day in target_days}
+
         # 创建可视化
         plt.figure(figsize=(20, 12))
 
         # 销售额对比
         plt.subplot(2, 3, 1)
-        sales_by_day = []
-        day_labels = []
-        for day, data in weekday_data.items():
-            sales_by_day.append(data['销售额'].tolist())
-            day_labels.append(f"{day}({len(data)}期)")
-
-        plt.boxplot(sales_by_day, labels=day_labels)
+        sales_by_day = [self.df.loc[self.df['中文星期'] == day, '销售额'].tolist() for day in stats.days]
+        plt.boxplot(sales_by_day, labels=[day_labels[day] for day in stats.days])
         plt.title('不同开奖日销售额分布对比')
         plt.ylabel('销售额（元）')
         plt.xticks(rotation=45)
         plt.grid(True, alpha=0.3)
 
-        # 前区号码频率对比
+        # 前区号码频率对比（只显示前15个号码）
         plt.subplot(2, 3, 2)
-        front_freq_by_day = {}
-        for day, data in weekday_data.items():
-            all_front = []
-            for _, row in data.iterrows():
-                front_numbers = row['前区号码'].split()
-                all_front.extend([int(num) for num in front_numbers])
-            front_freq_by_day[day] = Counter(all_front)
-
-        # 计算每个号码在不同日期的出现频率
-        all_front_numbers = list(range(1, 36))
-        freq_matrix = []
-        for num in all_front_numbers[:15]:  # 只显示前15个号码
-            freq_row = []
-            for day in target_days:
-                if day in front_freq_by_day:
-                    freq_row.append(front_freq_by_day[day].get(num, 0))
-                else:
-                    freq_row.append(0)
-            freq_matrix.append(freq_row)
-
-        freq_matrix = np.array(freq_matrix)
+        freq_matrix = np.array([stats.front_counts.get(day, np.zeros(FRONT_MAX, dtype=np.int64))[:15]
+                                for day in target_days]).T
         sns.heatmap(freq_matrix,
-                   xticklabels=[f"{day}({len(weekday_data.get(day, []))}期)" for day in target_days],
-                   yticklabels=[f"{num:02d}" for num in all_front_numbers[:15]],
+                   xticklabels=[day_labels[day] for day in target_days],
+                   yticklabels=[f"{num:02d}" for num in range(1, 16)],
                    annot=True, fmt='d', cmap='Blues')
         plt.title('前区号码频率对比（前15个号码）')
 
         # 后区号码频率对比
         plt.subplot(2, 3, 3)
-        back_freq_by_day = {}
-        for day, data in weekday_data.items():
-            all_back = []
-            for _, row in data.iterrows():
-                back_numbers = row['后区号码'].split()
-                all_back.extend([int(num) for num in back_numbers])
-            back_freq_by_day[day] = Counter(all_back)
-
-        # 计算后区号码频率矩阵
-        all_back_numbers = list(range(1, 13))
-        back_freq_matrix = []
-        for num in all_back_numbers:
-            freq_row = []
-            for day in target_days:
-                if day in back_freq_by_day:
-                    freq_row.append(back_freq_by_day[day].get(num, 0))
-                else:
-                    freq_row.append(0)
-            back_freq_matrix.append(freq_row)
-
-        back_freq_matrix = np.array(back_freq_matrix)
+        back_freq_matrix = np.array([stats.back_counts.get(day, np.zeros(BACK_MAX, dtype=np.int64))
+                                     for day in target_days]).T
         sns.heatmap(back_freq_matrix,
-                   xticklabels=[f"{day}({len(weekday_data.get(day, []))}期)" for day in target_days],
-                   yticklabels=[f"{num:02d}" for num in all_back_numbers],
+                   xticklabels=[day_labels[day] for day in target_days],
+                   yticklabels=[f"{num:02d}" for num in range(1, BACK_MAX + 1)],
                    annot=True, fmt='d', cmap='Reds')
         plt.title('后区号码频率对比')
 
-        # 奇偶比例分析
-        plt.subplot(2, 3, 4)
-        odd_even_patterns = {}
-        for day, data in weekday_data.items():
-            patterns = []
-            for _, row in data.iterrows():
-                front_numbers = [int(num) for num in row['前区号码'].split()]
-                odd_count = sum(1 for num in front_numbers if num % 2 == 1)
-                patterns.append(f"{odd_count}奇{5-odd_count}偶")
-            odd_even_patterns[day] = Counter(patterns)
-
-        # 绘制奇偶比例分布
-        pattern_types = ['1奇4偶', '2奇3偶', '3奇2偶', '4奇1偶', '5奇0偶']
-        x_pos = np.arange(len(pattern_types))
+        # 奇偶比例、大小号比例分布（1-5个奇数/小号）
         bar_width = 0.25
-
-        for i, (day, patterns) in enumerate(odd_even_patterns.items()):
-            counts = [patterns.get(pattern, 0) for pattern in pattern_types]
-            plt.bar(x_pos + i * bar_width, counts, bar_width, label=day)
-
-        plt.xlabel('奇偶比例')
-        plt.ylabel('出现次数')
-        plt.title('不同开奖日奇偶比例分布')
-        plt.xticks(x_pos + bar_width, pattern_types, rotation=45)
-        plt.legend()
-        plt.grid(axis='y', alpha=0.3)
-
-        # 大小号比例分析
-        plt.subplot(2, 3, 5)
-        size_patterns = {}
-        for day, data in weekday_data.items():
-            patterns = []
-            for _, row in data.iterrows():
-                front_numbers = [int(num) for num in row['前区号码'].split()]
-                small_count = sum(1 for num in front_numbers if num <= 17)
-                patterns.append(f"{small_count}小{5-small_count}大")
-            size_patterns[day] = Counter(patterns)
-
-        # 绘制大小号比例分布
-        size_types = ['1小4大', '2小3大', '3小2大', '4小1大', '5小0大']
-        x_pos = np.arange(len(size_types))
-
-        for i, (day, patterns) in enumerate(size_patterns.items()):
-            counts = [patterns.get(pattern, 0) for pattern in size_types]
-            plt.bar(x_pos + i * bar_width, counts, bar_width, label=day)
-
-        plt.xlabel('大小号比例')
-        plt.ylabel('出现次数')
-        plt.title('不同开奖日大小号比例分布')
-        plt.xticks(x_pos + bar_width, size_types, rotation=45)
-        plt.legend()
-        plt.grid(axis='y', alpha=0.3)
+        for position, histograms, pattern_types, xlabel, title in (
+                (4, stats.odd_counts, ['1奇4偶', '2奇3偶', '3奇2偶', '4奇1偶', '5奇0偶'], '奇偶比例', '不同开奖日奇偶比例分布'),
+                (5, stats.small_counts, ['1小4大', '2小3大', '3小2大', '4小1大', '5小0大'], '大小号比例', '不同开奖日大小号比例分布')):
+            plt.subplot(2, 3, position)
+            x_pos = np.arange(len(pattern_types))
+            for i, day in enumerate(stats.days):
+                plt.bar(x_pos + i * bar_width, histograms[day][1:], bar_width, label=day)
+            plt.xlabel(xlabel)
+            plt.ylabel('出现次数')
+            plt.title(title)
+            plt.xticks(x_pos + bar_width, pattern_types, rotation=45)
+            plt.legend()
+            plt.grid(axis='y', alpha=0.3)
 
         # 统计信息对比
         plt.subplot(2, 3, 6)
         stats_text = ""
-        for day, data in weekday_data.items():
-            avg_sales = data['销售额'].mean()
-            period_count = len(data)
+        for day in stats.days:
             stats_text += f"{day}开奖统计：\n"
-            stats_text += f"  期数：{period_count}期\n"
-            stats_text += f"  平均销售额：{avg_sales:.0f}元\n\n"
+            stats_text += f"  期数：{stats.draw_counts[day]}期\n"
+            stats_text += f"  平均销售额：{stats.sales_mean[day]:.0f}元\n\n"
 
         plt.text(0.1, 0.5, stats_text, fontsize=12, verticalalignment='center')
         plt.axis('off')
@@ -771,40 +2820,323 @@ class DLTAnalyzer:
         plt.tight_layout()
         plt.show()
 
-        # 打印详细统计信息
-        print("=== 不同开奖日统计对比 ===")
-        for day, data in weekday_data.items():
-            print(f"\n{day}开奖（{len(data)}期）：")
-            print(f"  平均销售额：{data['销售额'].mean():.2f}元")
-            print(f"  销售额标准差：{data['销售额'].std():.2f}元")
-
-            # 前区热门号码
-            all_front = []
-            for _, row in data.iterrows():
-                front_numbers = row['前区号码'].split()
-                all_front.extend([int(num) for num in front_numbers])
-            front_freq = Counter(all_front)
-            hot_front = [str(num) for num, _ in front_freq.most_common(5)]
-            print(f"  前区热门号码：{', '.join(hot_front)}")
-
-            # 后区热门号码
-            all_back = []
-            for _, row in data.iterrows():
-                back_numbers = row['后区号码'].split()
-                all_back.extend([int(num) for num in back_numbers])
-            back_freq = Counter(all_back)
-            hot_back = [str(num) for num, _ in back_freq.most_common(3)]
-            print(f"  后区热门号码：{', '.join(hot_back)}")
-
-
     def save_data(self, filename='dlt_data.csv'):
         """保存数据到CSV文件"""
         try:
-            self.df.to_csv(filename, index=False, encoding='utf-8-sig')
+            df = self.df
+            if '前区号码' not in df:
+                # 由列存储加载的数据没有号码字符串列，保存时由号码矩阵生成
+                df = df.copy()
+                df.insert(2, '前区号码', format_numbers(self.front_matrix))
+                df.insert(3, '后区号码', format_numbers(self.back_matrix))
+            df.to_csv(filename, index=False, encoding='utf-8-sig')
             print(f"数据已保存到：{filename}")
         except Exception as e:
             print(f"保存数据失败：{e}")
 
+def _report_sales_trend(analyzer):
+    predicted_sales = analyzer.analyze_sales_trend()
+    sales = analyzer.df['销售额']
+    return {'predicted_sales': predicted_sales, 'mean': sales.mean(), 'median': sales.median(),
+            'max': sales.max(), 'min': sales.min(), 'std': sales.std()}
+
+
+def _report_number_frequency(analyzer):
+    analyzer.analyze_number_frequency(top_n=10)
+    front_counts, back_counts = analyzer.frequency.counts()
+    return {'front_counts': dict(zip(range(1, FRONT_MAX + 1), front_counts.tolist())),
+            'back_counts': dict(zip(range(1, BACK_MAX + 1), back_counts.tolist()))}
+
+
+def _report_omission(analyzer):
+    summary = analyzer.analyze_omission(top_n=10)
+    if summary is None:
+        return {}
+    return {area: {int(row['号码']): {'current': int(row['当前遗漏']), 'max': int(row['最大遗漏']),
+                                     'mean': None if np.isnan(row['平均遗漏']) else float(row['平均遗漏'])}
+                   for _, row in table.iterrows()}
+            for area, table in summary.groupby('区域', sort=False)}
+
+
+def _report_prediction(analyzer):
+    predicted_front, predicted_back = analyzer.predict_lottery_numbers()
+    return {'front': sorted(predicted_front or []), 'back': sorted(predicted_back or [])}
+
+
+def _report_weekday_patterns(analyzer):
+    stats = analyzer.analyze_weekday_patterns()
+    if stats is None:
+        return {}
+    return {day: {'draws': stats.draw_counts[day], 'sales_mean': stats.sales_mean[day],
+                  'sales_std': stats.sales_std[day], 'hot_front': stats.hot_numbers(day, 'front', 5),
+                  'hot_back': stats.hot_numbers(day, 'back', 3)} for day in stats.days}
+
+
+def _report_expert_analysis(analyzer):
+    result_df = ExpertAnalyzer().run_expert_analysis()
+    return {'experts': 0 if result_df is None else len(result_df)}
+
+
+# 综合报告的各个部分：名称 -> 生成函数（返回可写入JSON的摘要）
+REPORT_SECTIONS = {
+    'sales_trend': _report_sales_trend,
+    'number_frequency': _report_number_frequency,
+    'omission': _report_omission,
+    'prediction': _report_prediction,
+    'weekday_patterns': _report_weekday_patterns,
+    'expert_analysis': _report_expert_analysis,
+}
+
+
+def _json_default(value):
+    """将NumPy/pandas标量转换为JSON可写入的类型"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _render_report_section(name, lottery_data, cutoff_date, output_dir, formats, seed):
+    """在工作进程中生成报告的一部分：图表保存为文件，文字输出写入日志，返回摘要"""
+    plt.switch_backend('Agg')
+    random.seed(seed)
+    started = time.perf_counter()
+    log_file = os.path.join(output_dir, f"{name}.log")
+    summary = {'status': 'ok', 'figures': []}
+
+    with open(log_file, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        try:
+            analyzer = DLTAnalyzer(lottery_data, cutoff_date=cutoff_date)
+            summary['result'] = REPORT_SECTIONS[name](analyzer)
+        except BaseException as e:  # 专家分析爬取失败时会调用exit()
+            summary['status'] = 'error'
+            summary['error'] = f"{type(e).__name__}: {e}"
+
+        figure_numbers = plt.get_fignums()
+        for i, number in enumerate(figure_numbers, 1):
+            suffix = '' if len(figure_numbers) == 1 else f"_{i}"
+            for fmt in formats:
+                path = os.path.join(output_dir, f"{name}{suffix}.{fmt}")
+                plt.figure(number).savefig(path, dpi=150, bbox_inches='tight')
+                summary['figures'].append(os.path.basename(path))
+        plt.close('all')
+
+    summary['log'] = os.path.basename(log_file)
+    summary['seconds'] = time.perf_counter() - started
+    return name, summary
+
+
+def generate_report(lottery_data, output_dir='report', cutoff_date=CUTOFF_DATE, formats=('png', 'svg'),
+                    sections=None, workers=None, seed=0):
+    """无交互生成综合分析报告：各部分在进程池中并行绘图，输出图片和summary.json"""
+    os.makedirs(output_dir, exist_ok=True)
+    plt.switch_backend('Agg')
+    sections = list(sections or REPORT_SECTIONS)
+    print(f"开始生成综合分析报告：{', '.join(sections)}")
+
+    started = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers or min(len(sections), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(_render_report_section, name, lottery_data, cutoff_date, output_dir, formats, seed)
+                   for name in sections]
+        for future in as_completed(futures):
+            name, summary = future.result()
+            results[name] = summary
+            print(f"  {name}：{'完成' if summary['status'] == 'ok' else summary['error']}（{summary['seconds']:.1f}秒）")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'draws': len(lottery_data['期号']) if isinstance(lottery_data, dict) else len(lottery_data),
+        'cutoff_date': cutoff_date.strftime('%Y-%m-%d') if cutoff_date else None,
+        'seed': seed,
+        'seconds': time.perf_counter() - started,
+        'sections': {name: results[name] for name in sections},
+    }
+    summary_file = os.path.join(output_dir, 'summary.json')
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=_json_default)
+    print(f"综合分析报告已生成：{output_dir}（{report['seconds']:.1f}秒）")
+    return report
+
+
+def benchmark_parsers(corpus_dir='dlt_html_corpus', repeat=5):
+    """对语料目录中的开奖页面进行解析基准测试，输出各后端的每秒解析行数"""
+    files = sorted(name for name in os.listdir(corpus_dir) if name.endswith('.html'))
+    if not files:
+        print(f"语料目录 {corpus_dir} 中没有HTML文件")
+        return {}
+    pages = []
+    for name in files:
+        with open(os.path.join(corpus_dir, name), 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    spider = DLTSpider()
+    reference = spider.parse_lottery_data(pages, parser='bs4', verbose=False)
+    print(f"\n=== 解析基准测试：{len(pages)}个页面，{len(reference)}行数据 ===")
+    # 边界页面：没有tbody的表格，各后端都应返回空结果
+    edge_pages = [page.replace('<tbody>', '').replace('</tbody>', '') for page in pages[:1]]
+    edge_reference = spider.parse_lottery_data(edge_pages, parser='bs4', verbose=False)
+
+    results = {}
+    for name in available_parsers():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = spider.parse_lottery_data(pages, parser=name, verbose=False)
+            best = min(best, time.perf_counter() - start)
+        identical = (output == reference
+                     and spider.parse_lottery_data(edge_pages, parser=name, verbose=False) == edge_reference)
+        rows_per_second = len(output) / best if best > 0 else float('inf')
+        results[name] = {'seconds': best, 'rows_per_second': rows_per_second, 'identical': identical}
+        print(f"{name:<12}{best * 1000:>10.2f} ms{rows_per_second:>14.0f} 行/秒   与bs4结果一致：{'是' if identical else '否'}")
+    return results
+
+
+def best_time(func, repeat):
+    """运行func repeat次，返回(最短耗时秒数, 最后一次的结果)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_frequency(n_draws=100000, repeat=3):
+    """对比逐行循环与FrequencyEngine在n_draws期模拟数据上的号码频率统计耗时"""
+    analyzer = DLTAnalyzer(generate_synthetic_draws(n_draws), cutoff_date=None)
+
+    def loop_counts():
+        all_front_numbers = []
+        all_back_numbers = []
+        for _, row in analyzer.df.iterrows():
+            all_front_numbers.extend([int(num) for num in row['前区号码'].split()])
+            all_back_numbers.extend([int(num) for num in row['后区号码'].split()])
+        return Counter(all_front_numbers), Counter(all_back_numbers)
+
+    loop_seconds, loop_result = best_time(loop_counts, repeat)
+    engine_seconds, engine_result = best_time(analyzer.frequency.counters, repeat)
+    print(f"\n=== 号码频率统计基准测试：{len(analyzer.df)}期 ===")
+    print(f"iterrows循环：{loop_seconds * 1000:.1f} ms")
+    print(f"FrequencyEngine：{engine_seconds * 1000:.3f} ms（{loop_seconds / engine_seconds:.0f}倍）")
+    print(f"结果一致：{'是' if loop_result == engine_result else '否'}")
+    return {'loop_seconds': loop_seconds, 'engine_seconds': engine_seconds}
+
+
+def benchmark_weekday(n_draws=100000, repeat=3):
+    """对比逐星期iterrows循环与WeekdayStatistics分组统计的耗时"""
+    analyzer = DLTAnalyzer(generate_synthetic_draws(n_draws), cutoff_date=None)
+    target_days = ['周一', '周三', '周六']
+
+    def loop_statistics():
+        result = {}
+        for day in target_days:
+            data = analyzer.df[analyzer.df['中文星期'] == day]
+            front, back, odd, small = Counter(), Counter(), Counter(), Counter()
+            for _, row in data.iterrows():
+                front.update(int(num) for num in row['前区号码'].split())
+            for _, row in data.iterrows():
+                back.update(int(num) for num in row['后区号码'].split())
+            for _, row in data.iterrows():
+                odd[sum(1 for num in row['前区号码'].split() if int(num) % 2 == 1)] += 1
+            for _, row in data.iterrows():
+                small[sum(1 for num in row['前区号码'].split() if int(num) <= 17)] += 1
+            for _, row in data.iterrows():
+                pass  # 原实现打印热门号码时再次遍历
+            result[day] = (front, back, odd, small, data['销售额'].mean())
+        return result
+
+    loop_seconds, loop_result = best_time(loop_statistics, repeat)
+    engine_seconds, stats = best_time(lambda: analyzer.weekday_statistics(target_days), repeat)
+    identical = all(
+        [loop_result[day][0].get(num, 0) for num in range(1, FRONT_MAX + 1)] == stats.front_counts[day].tolist()
+        and [loop_result[day][1].get(num, 0) for num in range(1, BACK_MAX + 1)] == stats.back_counts[day].tolist()
+        and [loop_result[day][2].get(i, 0) for i in range(FRONT_PICK + 1)] == stats.odd_counts[day].tolist()
+        and [loop_result[day][3].get(i, 0) for i in range(FRONT_PICK + 1)] == stats.small_counts[day].tolist()
+        for day in target_days)
+    print(f"\n=== 开奖日分组统计基准测试：{len(analyzer.df)}期 ===")
+    print(f"iterrows循环：{loop_seconds * 1000:.1f} ms")
+    print(f"WeekdayStatistics：{engine_seconds * 1000:.2f} ms（{loop_seconds / engine_seconds:.0f}倍）")
+    print(f"结果一致：{'是' if identical else '否'}")
+    return {'loop_seconds': loop_seconds, 'engine_seconds': engine_seconds}
+
+
+def benchmark_prize_check(n_tickets=10_000_000, n_draws=8):
+    """在n_tickets注随机号码上测试单期和多期（多进程）兑奖的耗时"""
+    rng = np.random.default_rng(0)
+    analyzer = DLTAnalyzer(generate_synthetic_draws(n_draws), cutoff_date=None)
+    front = sample_without_replacement(np.ones(FRONT_MAX), n_tickets, FRONT_PICK, rng)
+    back = sample_without_replacement(np.ones(BACK_MAX), n_tickets, BACK_PICK, rng)
+
+    started = time.perf_counter()
+    single = count_prizes(front, back, analyzer.front_matrix[-1], analyzer.back_matrix[-1])
+    single_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    serial = count_prizes_history(front, back, analyzer.front_matrix, analyzer.back_matrix, workers=1)
+    serial_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    parallel = count_prizes_history(front, back, analyzer.front_matrix, analyzer.back_matrix)
+    parallel_seconds = time.perf_counter() - started
+
+    print(f"\n=== 兑奖基准测试：{n_tickets}注 ===")
+    print(f"单期兑奖：{single_seconds:.2f}秒，中奖{single[1:].sum()}注")
+    print(f"{n_draws}期单进程：{serial_seconds:.2f}秒")
+    print(f"{n_draws}期多进程（{os.cpu_count()}核）：{parallel_seconds:.2f}秒，结果一致：{'是' if (serial == parallel).all() else '否'}")
+    return {'single_seconds': single_seconds, 'serial_seconds': serial_seconds, 'parallel_seconds': parallel_seconds}
+
+
+# 模块冷启动导入耗时目标（毫秒）
+IMPORT_TIME_TARGET_MS = 250
+# 导入本模块时不应被加载的重量级依赖
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'selenium', 'webdriver_manager', 'bs4', 'requests', 'lxml',
+                 'selectolax']
+
+
+def benchmark_import(repeat=5, target_ms=IMPORT_TIME_TARGET_MS):
+    """用 python -X importtime 测量导入本模块的冷启动耗时，并检查是否加载了重量级依赖"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    best_us = None
+    loaded_heavy = set()
+
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                                   cwd=module_dir, capture_output=True, text=True)
+        # 每行格式：import time: self [us] | cumulative | imported package
+        for line in completed.stderr.splitlines():
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) != 3 or not parts[1].isdigit():
+                continue
+            package = parts[2]
+            if package == module_name:
+                cumulative = int(parts[1])
+                best_us = cumulative if best_us is None else min(best_us, cumulative)
+            elif package.split('.')[0] in HEAVY_MODULES:
+                loaded_heavy.add(package.split('.')[0])
+
+    if best_us is None:
+        print("未能测量导入耗时")
+        return None
+    best_ms = best_us / 1000
+    print("\n=== 导入耗时基准测试 ===")
+    print(f"import {module_name}：{best_ms:.1f} ms（目标 {target_ms} ms，{'达标' if best_ms <= target_ms else '超出目标'}）")
+    print(f"导入时加载的重量级依赖：{', '.join(sorted(loaded_heavy)) if loaded_heavy else '无'}")
+    return {'import_ms': best_ms, 'target_ms': target_ms, 'heavy_modules': sorted(loaded_heavy)}
+
+
+# 可通过 --bench NAME 运行的基准测试
+BENCHMARKS = {
+    'frequency': benchmark_frequency,
+    'prize': benchmark_prize_check,
+    'weekday': benchmark_weekday,
+    'import': benchmark_import,
+}
+
+
 def show_menu():
     """显示菜单"""
     print("\n" + "="*60)
@@ -817,42 +3149,169 @@ def show_menu():
     print("4. 不同开奖日对比分析")
     print("5. 专家数据统计分析")
     print("6. 综合分析报告")
+    print("7. 增量更新开奖数据")
+    print("8. 预测算法历史回测")
+    print("9. 号码遗漏统计分析")
     print("0. 退出系统")
     print("="*60)
 
-def main():
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='大乐透数据分析系统')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='http',
+                        help='开奖数据获取方式：http接口（默认）或selenium浏览器')
+    parser.add_argument('--api-url', default=None, help='开奖数据接口地址（可指向本地测试服务器）')
+    parser.add_argument('--update', action='store_true',
+                        help='启动时增量获取本地CSV之后的新开奖数据')
+    parser.add_argument('--backfill', action='store_true',
+                        help='回溯获取2007年首期以来的全部历史开奖数据（支持断点续爬）')
+    parser.add_argument('--workers', type=int, default=4, help='回溯爬取的并发数')
+    parser.add_argument('--no-cutoff', action='store_true',
+                        help='分析全部数据，不过滤2025年7月1日之后的开奖')
+    parser.add_argument('--parser', choices=list(PARSER_BACKENDS), default=None,
+                        help='开奖页面解析后端，默认自动选择最快的可用后端')
+    parser.add_argument('--save-corpus', metavar='DIR', default=None,
+                        help='浏览器爬取时把开奖页面保存到该目录')
+    parser.add_argument('--bench-parse', metavar='DIR', default=None,
+                        help='对目录中保存的开奖页面运行解析基准测试')
+    parser.add_argument('--seed', type=int, default=0, help='回测和批量选号使用的随机数种子')
+    parser.add_argument('--tickets', type=int, default=None, metavar='K',
+                        help='按综合评分批量生成K注号码后退出')
+    parser.add_argument('--tickets-out', default='tickets.csv',
+                        help='批量号码输出文件（.npz保存为数组，其他保存为CSV）')
+    parser.add_argument('--check', metavar='FILE', default=None,
+                        help='对号码文件（.npz或CSV）兑奖，默认核对最新一期')
+    parser.add_argument('--check-periods', nargs='*', default=None, metavar='PERIOD',
+                        help='兑奖的期号，不带期号时核对全部历史开奖')
+    parser.add_argument('--additional', action='store_true', help='兑奖时按追加投注计算')
+    parser.add_argument('--report', metavar='DIR', default=None,
+                        help='无交互生成综合分析报告（图片和summary.json）到该目录')
+    parser.add_argument('--report-sections', nargs='+', choices=list(REPORT_SECTIONS), default=None,
+                        help='报告包含的部分，默认全部')
+    parser.add_argument('--bench', choices=list(BENCHMARKS), default=None,
+                        help='运行指定的基准测试')
+    parser.add_argument('--store', default='大乐透开奖数据.store',
+                        help='开奖数据的类型化存储目录（每列一个.npy文件）')
+    parser.add_argument('--export-csv', metavar='FILE', default=None, help='把开奖数据导出为CSV文件')
+    parser.add_argument('--cache-dir', default='.http_cache', help='HTTP响应缓存目录')
+    parser.add_argument('--no-cache', action='store_true', help='不使用HTTP响应缓存')
+    parser.add_argument('--expert-workers', type=int, default=8, help='并发获取专家详情页的线程数')
+    parser.add_argument('--expert-ranking', metavar='STORE', default=None,
+                        help='分页获取完整专家排行（去重后写入该存储目录）后退出')
+    parser.add_argument('--ranking-targets', nargs='+', default=['总分'], help='专家排行的排序指标')
+    parser.add_argument('--ranking-issues', nargs='+', type=int, default=[7], help='专家排行统计的期数')
+    parser.add_argument('--ranking-resume', action='store_true', help='专家排行从上次中断的位置继续获取')
+    parser.add_argument('--serve-fixture', type=int, metavar='PORT', default=None,
+                        help='使用本地CSV数据启动离线测试服务器')
+    return parser.parse_args(argv)
+
+
+def serve_fixture(port, filename='大乐透开奖数据.csv'):
+    """使用本地CSV数据启动开奖接口测试服务器"""
+    df = pd.read_csv(filename, encoding='utf-8-sig', dtype=str)
+    server = DLTFixtureServer(df.to_dict('records'), port=port).start()
+    print(f"测试服务器已启动：{server.api_url}（按Ctrl+C退出）")
+    print(f"专家排行：{server.expert_list_url}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+    if args.serve_fixture is not None:
+        serve_fixture(args.serve_fixture)
+        return
+    if args.bench_parse:
+        benchmark_parsers(args.bench_parse)
+        return
+    if args.bench:
+        BENCHMARKS[args.bench]()
+        return
+    if args.expert_ranking:
+        cache = None if args.no_cache else ResponseCache(args.cache_dir)
+        ExpertAnalyzer(workers=args.expert_workers, cache=cache).crawl_expert_ranking(
+            args.ranking_targets, args.ranking_issues, store_path=args.expert_ranking, resume=args.ranking_resume)
+        return
+
     print("=== 大乐透数据分析系统启动 ===")
 
+    data_file = '大乐透开奖数据.csv'
+    cutoff_date = None if args.no_cutoff else CUTOFF_DATE
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    spider = DLTSpider(backend=args.backend, api_url=args.api_url, parser=args.parser, corpus_dir=args.save_corpus,
+                       cache=cache)
+
+    if args.backfill:
+        try:
+            spider.crawl_full_history(data_file, max_workers=args.workers)
+        except Exception as e:
+            print(f"历史数据回溯失败：{e}")
+
     # 加载数据
     try:
         print("正在加载数据...")
-        # 优先从CSV文件加载
+        # 优先从类型化数据存储加载，CSV比存储新时由CSV重建
+        store = ColumnStore(args.store)
         try:
-            df_existing = pd.read_csv('大乐透开奖数据.csv', encoding='utf-8-sig')
-            if not df_existing.empty:
-                print(f"从CSV文件加载数据成功，共{len(df_existing)}条记录")
-                lottery_data = df_existing.to_dict('records')
-            else:
-                raise FileNotFoundError("CSV文件为空")
-        except:
-            # 如果CSV文件不存在或为空，从爬虫获取数据
+            lottery_data = load_lottery_store(store, data_file)
+        except Exception as e:
+            print(f"读取本地数据失败：{e}")
+            lottery_data = None
+        crawled = lottery_data is None
+        if crawled:
+            # 如果本地数据不存在或为空，从爬虫获取数据
             print("CSV文件不存在或为空，尝试获取新数据...")
-            spider = DLTSpider()
-            lottery_data = spider.crawl_lottery_data(target_periods=100)
-            if not lottery_data:
+            records = spider.crawl_lottery_data(target_periods=100)
+            if not records:
                 print("无法获取数据，程序退出")
                 return
+            lottery_data = lottery_arrays(records)
+
+        if args.update and not crawled:
+            try:
+                lottery_data = lottery_arrays(update_lottery_data(spider, data_file))
+            except Exception as e:
+                print(f"增量更新失败：{e}")
 
         # 创建分析器实例
-        analyzer = DLTAnalyzer(lottery_data)
-        analyzer.save_data('大乐透开奖数据.csv')
+        analyzer = DLTAnalyzer(lottery_data, cutoff_date=cutoff_date)
+        # 只有新爬取的数据才需要写入CSV，避免覆盖增量更新得到的新开奖数据
+        if crawled:
+            analyzer.save_data(data_file)
+        # 数据存储只在内容变化时重写
+        if store.save(lottery_data, file_signature(data_file)):
+            print(f"已写入数据存储：{store.path}")
+        if args.export_csv:
+            lottery_frame(lottery_data).to_csv(args.export_csv, index=False, encoding='utf-8-sig')
+            print(f"开奖数据已导出到：{args.export_csv}")
+
+        if args.report:
+            generate_report(lottery_data, args.report, cutoff_date=cutoff_date,
+                            sections=args.report_sections, seed=args.seed)
+            return
+        if args.tickets:
+            analyzer.generate_ticket_batch(args.tickets, seed=args.seed, filename=args.tickets_out)
+            return
+        if args.check:
+            front, back = load_tickets(args.check)
+            if args.check_periods is None:
+                periods = None
+            else:
+                periods = args.check_periods or analyzer.df['期号'].tolist()
+            result = analyzer.check_tickets(front, back, periods=periods, additional=args.additional)
+            if result is not None and len(result) > 1:
+                result.to_csv('prize_check_result.csv', index=False, encoding='utf-8-sig')
+                print("逐期兑奖结果已保存到：prize_check_result.csv")
+            return
 
         # 主循环
         while True:
             show_menu()
             try:
-                choice = input("请输入选择（0-6）：").strip()
+                choice = input("请输入选择（0-9）：").strip()
 
                 if choice == '0':
                     print("感谢使用大乐透数据分析系统！")
@@ -879,7 +3338,7 @@ def main():
                     print("=== 专家数据分析功能 ===")
 
                     # 创建专家分析器实例
-                    analyzer1 = ExpertAnalyzer()
+                    analyzer1 = ExpertAnalyzer(workers=args.expert_workers, cache=cache)
                     # 运行完整的专家数据分析流程
                     result_df = analyzer1.run_expert_analysis()
                     if result_df is not None:
@@ -892,11 +3351,12 @@ def main():
                     # 执行所有分析
                     analyzer.analyze_sales_trend()
                     analyzer.analyze_number_frequency(top_n=10)
+                    analyzer.analyze_omission(top_n=10)
                     predicted_front, predicted_back = analyzer.predict_lottery_numbers()
                     analyzer.analyze_weekday_patterns()
 
                     # 创建专家分析器实例
-                    analyzer1 = ExpertAnalyzer()
+                    analyzer1 = ExpertAnalyzer(workers=args.expert_workers, cache=cache)
                     # 运行完整的专家数据分析流程
                     result_df = analyzer1.run_expert_analysis()
 
@@ -906,6 +3366,16 @@ def main():
                         print(f"\n🎯 最终推荐号码：")
                         print(f"前区：{' '.join(front_str)}")
                         print(f"后区：{' '.join(back_str)}")
+                elif choice == '7':
+                    print("\n执行增量更新开奖数据...")
+                    lottery_data = update_lottery_data(spider, data_file)
+                    analyzer = DLTAnalyzer(lottery_data, cutoff_date=cutoff_date)
+                elif choice == '8':
+                    print("\n执行预测算法历史回测...")
+                    analyzer.backtest_predictions(seed=args.seed)
+                elif choice == '9':
+                    print("\n执行号码遗漏统计分析...")
+                    analyzer.analyze_omission(top_n=10)
                 else:
                     print("无效选择，请重新输入！")
 
@@ -923,10 +3393,195 @@ def main():
 
 
 
-class ExpertAnalyzer:
+# 专家详情页的字段匹配规则（预编译）
+EXPERT_YEARS_RE = re.compile(r'彩龄：\s*(\d+)年')
+EXPERT_ARTICLES_RE = re.compile(r'文章数量：\s*(\d+)篇')
+EXPERT_AWARD_RE = re.compile(r'(\d+)次')
+
+
+def _class_xpath(tag, class_name):
+    return f"descendant::{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+def _expert_fields(paragraphs, award_blocks, detail_data):
+    """从段落文本和(标题, 奖项文本列表)中提取彩龄、文章数量和双色球获奖次数"""
+    for text in paragraphs:
+        if '彩龄：' in text:
+            match = EXPERT_YEARS_RE.search(text)
+            if match:
+                detail_data['experience_years'] = int(match.group(1))
+        elif '文章数量：' in text:
+            match = EXPERT_ARTICLES_RE.search(text)
+            if match:
+                detail_data['article_count'] = int(match.group(1))
+
+    # 第一个双色球大奖战绩区域中所有奖项次数之和
+    for title, items in award_blocks:
+        if title is not None and '双色球' in title:
+            matches = (EXPERT_AWARD_RE.search(item) for item in items)
+            detail_data['total_awards'] = sum(int(match.group(1)) for match in matches if match)
+            break
+    return detail_data
+
+
+def extract_expert_detail(html, expert_name):
+    """解析专家详情页（可在工作进程中运行），lxml可用时使用lxml，否则使用BeautifulSoup；
+    返回的detail_data中found表示是否找到专家信息区域"""
+    detail_data = {'name': expert_name, 'experience_years': 0, 'article_count': 0, 'total_awards': 0}
+    lxml_html = _lxml_html()
+    if lxml_html is not None:
+        document = lxml_html.fromstring(html)
+        okami_text = next(iter(document.xpath(_class_xpath('div', 'okami-text'))), None)
+        if okami_text is None:
+            return dict(detail_data, found=False)
+        paragraphs = [p.text_content() for p in okami_text.iter('p')]
+        award_blocks = []
+        for djzj in document.xpath(_class_xpath('div', 'djzj')):
+            span = next(iter(djzj.xpath(_class_xpath('span', 'text-head-bg'))), None)
+            award_blocks.append((None if span is None else span.text_content(),
+                                 [item.text_content() for item in djzj.xpath(_class_xpath('div', 'item'))]))
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        okami_text = soup.find('div', class_='okami-text')
+        if not okami_text:
+            return dict(detail_data, found=False)
+        paragraphs = [p.get_text() for p in okami_text.find_all('p')]
+        award_blocks = []
+        for djzj in soup.find_all('div', class_='djzj'):
+            span = djzj.find('span', class_='text-head-bg')
+            award_blocks.append((span.get_text() if span else None,
+                                 [item.get_text() for item in djzj.find_all('div', class_='item')]))
+    return dict(_expert_fields(paragraphs, award_blocks, detail_data), found=True)
+
+
+def _parse_expert_page(expert_id, html, expert_name):
+    """解析阶段的任务函数，返回(专家ID, 详细信息)"""
+    try:
+        detail_data = extract_expert_detail(html, expert_name)
+    except Exception as e:
+        print(f"解析专家 {expert_name} 详细信息时出错: {e}")
+        detail_data = {'name': expert_name, 'experience_years': 0, 'article_count': 0, 'total_awards': 0}
+    detail_data.pop('found', None)
+    return expert_id, detail_data
+
+
+# 专家统计指标，顺序即相关系数矩阵的行列顺序
+EXPERT_METRICS = ['experience_years', 'article_count', 'total_awards', 'follow', 'norm', 'win_rate']
+
+
+def expert_win_rate(total_awards, article_count):
+    """中奖率=获奖次数/文章数量，文章数量为0时记为0"""
+    awards = np.asarray(total_awards, dtype=np.float64)
+    articles = np.asarray(article_count, dtype=np.float64)
+    return np.divide(awards, articles, out=np.zeros_like(awards), where=articles > 0)
+
+
+class ExpertStatistics:
+    """专家数据的向量化统计结果：均值、相关系数矩阵、按等级汇总和排名百分位。
+    保存计数、和、叉积及各指标的有序数组，追加专家时只处理新增的行"""
+
     def __init__(self):
-        self.expert_list_url = "https://i.cmzj.net/expert/rankingList?limit=30&page=1&lottery=23&quota=1&type=2&target=%E6%80%BB%E5%88%86&classPay=2&issueNum=7"
-        self.expert_detail_url = "https://www.cmzj.net/expertItem?id={}"
+        self.count = 0
+        # 以第一批数据的均值为偏移量累积，减少大数相减的精度损失
+        self.shift = None
+        self.sums = np.zeros(len(EXPERT_METRICS))
+        self.cross = np.zeros((len(EXPERT_METRICS), len(EXPERT_METRICS)))
+        self.grade_counts = {}
+        self.grade_sums = {}
+        self.sorted_values = np.zeros((len(EXPERT_METRICS), 0))
+
+    @classmethod
+    def compute(cls, df):
+        stats = cls()
+        stats.update(df)
+        return stats
+
+    @staticmethod
+    def metric_matrix(df):
+        """返回(N,6)的指标矩阵，缺少的列记为0"""
+        n = len(df)
+        columns = {}
+        for metric in EXPERT_METRICS[:-1]:
+            values = pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=np.float64) \
+                if metric in df else np.zeros(n)
+            columns[metric] = np.nan_to_num(values)
+        columns['win_rate'] = expert_win_rate(columns['total_awards'], columns['article_count'])
+        return np.column_stack([columns[metric] for metric in EXPERT_METRICS])
+
+    def update(self, df):
+        """追加一批专家，更新全部统计量"""
+        values = self.metric_matrix(df)
+        if len(values) == 0:
+            return self
+        if self.shift is None:
+            self.shift = values.mean(axis=0)
+        centered = values - self.shift
+        self.count += len(values)
+        self.sums += centered.sum(axis=0)
+        self.cross += centered.T @ centered
+
+        grades = df['grade_name'].fillna('').astype(str).to_numpy() if 'grade_name' in df else np.full(len(df), '')
+        codes, names = pd.factorize(grades)
+        counts = np.bincount(codes, minlength=len(names))
+        sums = np.zeros((len(names), len(EXPERT_METRICS)))
+        np.add.at(sums, codes, values)
+        for i, grade in enumerate(names):
+            self.grade_counts[grade] = self.grade_counts.get(grade, 0) + int(counts[i])
+            self.grade_sums[grade] = self.grade_sums.get(grade, 0) + sums[i]
+
+        # 两段有序数组合并（稳定排序对已有序的分段是线性的）
+        self.sorted_values = np.sort(np.concatenate([self.sorted_values, np.sort(values.T, axis=1)], axis=1),
+                                     axis=1, kind='stable')
+        return self
+
+    @property
+    def means(self):
+        return pd.Series(self.shift + self.sums / self.count, index=EXPERT_METRICS)
+
+    @property
+    def correlation(self):
+        """皮尔逊相关系数矩阵（与DataFrame.corr()相同），由叉积一次得到全部指标两两的相关系数"""
+        mean = self.sums / self.count
+        cov = self.cross / self.count - np.outer(mean, mean)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=EXPERT_METRICS, columns=EXPERT_METRICS)
+
+    def grade_summary(self):
+        """按专家等级汇总：人数和各指标均值"""
+        grades = list(self.grade_counts)
+        counts = np.array([self.grade_counts[grade] for grade in grades])
+        means = np.array([self.grade_sums[grade] for grade in grades]).reshape(len(grades), -1) / counts[:, None]
+        summary = pd.DataFrame(means, index=grades, columns=EXPERT_METRICS)
+        summary.insert(0, 'count', counts)
+        return summary
+
+    def percentile(self, metric, values):
+        """values在全体专家中的百分位（不高于该值的专家占比，0-100）"""
+        column = self.sorted_values[EXPERT_METRICS.index(metric)]
+        return np.searchsorted(column, np.asarray(values, dtype=np.float64), side='right') / self.count * 100
+
+    def rank_percentiles(self, df, metrics=('total_awards', 'win_rate', 'norm')):
+        """df中每位专家各指标的排名百分位"""
+        values = self.metric_matrix(df)
+        return pd.DataFrame({f"{metric}_pct": self.percentile(metric, values[:, EXPERT_METRICS.index(metric)])
+                             for metric in metrics}, index=df.index)
+
+
+class ExpertAnalyzer:
+    def __init__(self, backend='http', workers=8, rate=5.0, expert_list_url=None, expert_detail_url=None,
+                 cache=None, ranking_url=None, ranking_store='expert_ranking.store'):
+        self.expert_list_url = expert_list_url or "https://i.cmzj.net/expert/rankingList?limit=30&page=1&lottery=23&quota=1&type=2&target=%E6%80%BB%E5%88%86&classPay=2&issueNum=7"
+        # 分页排行接口，参数见fetch_ranking_page
+        self.ranking_url = ranking_url or "https://i.cmzj.net/expert/rankingList"
+        # 完整专家排行的存储目录，crawl_experts_data默认从这里读取专家列表
+        self.ranking_store = ranking_store
+        self.expert_detail_url = expert_detail_url or "https://www.cmzj.net/expertItem?id={}"
+        # 详情页获取方式：http直接请求（页面不含专家信息时自动改用浏览器），browser使用浏览器池
+        self.backend = backend
+        self.workers = workers
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
@@ -937,13 +3592,15 @@ class ExpertAnalyzer:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.fetcher = HttpFetcher(self.session, RateLimiter(rate), cache=cache)
+        # 最近一次分析的ExpertStatistics，可用update_statistics增量更新
+        self.statistics = None
 
     def get_expert_list(self):
         """获取专家列表数据"""
         try:
             print("正在获取专家列表...")
-            response = self.session.get(self.expert_list_url, timeout=10)
-            response.raise_for_status()
+            response = self.fetcher.get(self.expert_list_url, timeout=10)
 
             data = response.json()
             if data.get('code') == 0 and 'data' in data:
@@ -971,24 +3628,20 @@ class ExpertAnalyzer:
                 print("本地JSON文件格式错误")
             return None
 
-    def get_expert_detail(self, expert_id, expert_name):
-        """获取专家详细信息"""
-        try:
-            url = self.expert_detail_url.format(expert_id)
-            print(f"正在获取专家 {expert_name} (ID: {expert_id}) 的详细信息...")
-
-            # 配置浏览器选项
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')  # 无头模式
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-
+    def fetch_expert_detail_html(self, expert_id):
+        """获取专家详情页HTML，所有请求经过共享的限速器"""
+        url = self.expert_detail_url.format(expert_id)
+        if self.backend == 'http':
+            response = self.fetcher.get(url, timeout=10)
+            response.encoding = 'utf-8'
+            if 'okami-text' in response.text:
+                return response.text
+            # 专家信息由JS渲染，改用浏览器获取
+
+        # 从共享浏览器池借用浏览器，用完归还而不是关闭
+        with get_browser_pool(self.workers).driver() as driver:
+            self.fetcher.rate_limiter.wait()
             driver.get(url)
-            time.sleep(2)
 
             # 等待页面加载
             WebDriverWait(driver, 10).until(
@@ -997,174 +3650,233 @@ class ExpertAnalyzer:
 
             # 获取页面HTML
             html = driver.page_source
-            driver.quit()
 
-            return self.parse_expert_detail(html, expert_name)
-
-        except Exception as e:
-            print(f"获取专家 {expert_name} 详细信息失败: {e}")
-            return None
+        # 渲染后的页面覆盖HTTP缓存中未渲染的版本，下次直接命中
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.store(self.fetcher.cache.key(url), url, html.encode('utf-8'),
+                                     {'Content-Type': 'text/html; charset=utf-8'})
+        return html
+
+    def fetch_ranking_page(self, page, page_size=30, target='总分', issue_num=7):
+        """获取专家排行的一页"""
+        params = {
+            'limit': page_size,
+            'page': page,
+            'lottery': 23,
+            'quota': 1,
+            'type': 2,
+            'target': target,
+            'classPay': 2,
+            'issueNum': issue_num,
+        }
+        data = self.fetcher.get(self.ranking_url, params=params, timeout=10).json()
+        if data.get('code') != 0:
+            raise ValueError(f"排行接口返回错误：{data.get('msg', data.get('code'))}")
+        return data.get('data') or []
+
+    def iter_ranking_pages(self, page_size=30, target='总分', issue_num=7, max_pages=None, start_page=1):
+        """从start_page开始按页序逐页产出专家排行；每次并发请求workers页，遇到不足一页或空页时结束，
+        内存中最多保留workers页"""
+        page = start_page
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while max_pages is None or page <= max_pages:
+                last = page + self.workers if max_pages is None else min(page + self.workers, max_pages + 1)
+                futures = [executor.submit(self.fetch_ranking_page, p, page_size, target, issue_num)
+                           for p in range(page, last)]
+                for future in futures:
+                    experts = future.result()
+                    if experts:
+                        yield experts
+                    if len(experts) < page_size:
+                        return
+                page = last
+
+    def crawl_expert_ranking(self, targets=('总分',), issue_nums=(7,), store_path=None, page_size=30,
+                             max_pages=None, resume=False):
+        """分页爬取多个排行设置下的全部专家，按expertId去重后逐页追加写入存储，返回存储中的专家数；
+        每写入一页就在存储中记录进度，resume为True时跳过已完成的排行和页面继续爬取"""
+        store = ColumnStore(store_path or self.ranking_store)
+        progress = {}
+        seen = set()
+        if resume and store.exists():
+            progress = store.meta().get('progress', {})
+            for chunk in store.iter_chunks():
+                seen.update(int(expert_id) for expert_id in chunk['expert_id'])
+            print(f"从断点继续，存储中已有{len(seen)}位专家")
+        else:
+            store.clear()
+
+        for target in targets:
+            for issue_num in issue_nums:
+                key = f"{target}|{issue_num}"
+                done = progress.get(key, 0)
+                if done is True:
+                    continue
+                print(f"正在获取专家排行（{target}，近{issue_num}期）...")
+                pages = self.iter_ranking_pages(page_size, target, issue_num, max_pages, start_page=done + 1)
+                for page, experts in enumerate(pages, done + 1):
+                    rows = []
+                    for expert in experts:
+                        expert_id = expert.get('expertId')
+                        if expert_id in seen:
+                            continue
+                        seen.add(expert_id)
+                        rows.append({
+                            'expert_id': expert_id,
+                            'name': expert.get('name', ''),
+                            'lottery': expert.get('lottery', 0),
+                            'follow': expert.get('follow', 0),
+                            'grade_name': expert.get('gradeName', ''),
+                            'rank': expert.get('rank', 0),
+                            'norm': expert.get('norm', 0),
+                            'best_record': expert.get('bestRecord', ''),
+                            'good_record': expert.get('goodRecord', ''),
+                            'target': target,
+                            'issue_num': issue_num,
+                        })
+                    if rows:
+                        store.append(frame_arrays(pd.DataFrame(rows), EXPERT_COLUMN_TYPES))
+                    progress[key] = page
+                    if store.exists():
+                        store.update_meta(progress=progress)
+                progress[key] = True
+                if store.exists():
+                    store.update_meta(progress=progress)
+                print(f"已写入 {len(seen)} 位专家")
+
+        if store.exists():
+            store.update_meta(progress=progress, complete=True)
+        print(f"专家排行获取完成，共{len(seen)}位专家（已按expertId去重），保存到：{store.path}")
+        return len(seen)
+
+    def iter_ranking_store(self, store_path=None):
+        """逐块读取排行存储，按排行接口的字段格式逐个产出专家"""
+        for chunk in ColumnStore(store_path or self.ranking_store).iter_chunks():
+            for i in range(len(chunk['expert_id'])):
+                yield {
+                    'expertId': int(chunk['expert_id'][i]),
+                    'name': str(chunk['name'][i]),
+                    'lottery': int(chunk['lottery'][i]),
+                    'follow': int(chunk['follow'][i]),
+                    'gradeName': str(chunk['grade_name'][i]),
+                    'rank': int(chunk['rank'][i]),
+                    'norm': int(chunk['norm'][i]),
+                    'bestRecord': str(chunk['best_record'][i]),
+                    'goodRecord': str(chunk['good_record'][i]),
+                }
 
-    def parse_expert_detail(self, html, expert_name):
-        """解析专家详细信息"""
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # 初始化返回数据
-            detail_data = {
-                'name': expert_name,
-                'experience_years': 0,
-                'article_count': 0,
-                'total_awards': 0
-            }
+    def ranking_experts(self):
+        """返回完整专家排行（生成器）；存储不完整时先分页爬取（从断点继续），失败时退回单页排行接口"""
+        store = ColumnStore(self.ranking_store)
+        if not (store.exists() and store.meta().get('complete')):
+            try:
+                self.crawl_expert_ranking(resume=True)
+            except Exception as e:
+                print(f"分页获取专家排行失败: {e}，改用单页排行")
+                return self.get_expert_list()
+        else:
+            print(f"从排行存储 {self.ranking_store} 读取专家列表")
+        return self.iter_ranking_store()
+
+    def fetch_expert_details(self, experts, parse_workers=None):
+        """两阶段流水线获取专家详情：workers个线程抓取原始页面放入队列，解析阶段从队列取出页面交给
+        parse_workers个进程解析（0表示在解析线程内解析），抓取不等待解析；experts为(专家ID, 名称)列表，
+        返回 专家ID -> 详细信息"""
+        if parse_workers is None:
+            parse_workers = os.cpu_count() or 1
+        if self.backend == 'browser':
+            # 每个详情页都要用浏览器，抓取开始前先启动workers个浏览器实例
+            get_browser_pool(self.workers).warm_up()
+        raw_pages = queue.Queue()
+        results = {}
+
+        def fetch(expert_id, expert_name):
+            try:
+                raw_pages.put((expert_id, self.fetch_expert_detail_html(expert_id), expert_name))
+            except Exception as e:
+                print(f"获取专家 {expert_name} 详细信息失败: {e}")
 
-            # 查找包含专家信息的div
-            okami_text = soup.find('div', class_='okami-text')
-            if not okami_text:
-                print(f"未找到专家 {expert_name} 的详细信息区域")
-                return detail_data
-
-            # 提取彩龄
-            for p in okami_text.find_all('p'):
-                text = p.get_text()
-                if '彩龄：' in text:
-                    years_match = re.search(r'彩龄：\s*(\d+)年', text)
-                    if years_match:
-                        detail_data['experience_years'] = int(years_match.group(1))
-                        print(f"  彩龄: {detail_data['experience_years']}年")
-
-                # 提取文章数量
-                elif '文章数量：' in text:
-                    articles_match = re.search(r'文章数量：\s*(\d+)篇', text)
-                    if articles_match:
-                        detail_data['article_count'] = int(articles_match.group(1))
-                        print(f"  文章数量: {detail_data['article_count']}篇")
-
-            # 提取双色球大奖战绩
-            djzj_divs = soup.find_all('div', class_='djzj')
-            for djzj in djzj_divs:
-                span = djzj.find('span', class_='text-head-bg')
-                if span and '双色球' in span.get_text():
-                    # 统计所有奖项
-                    items = djzj.find_all('div', class_='item')
-                    total_awards = 0
-                    for item in items:
-                        award_match = re.search(r'(\d+)次', item.get_text())
-                        if award_match:
-                            total_awards += int(award_match.group(1))
-
-                    detail_data['total_awards'] = total_awards
-                    print(f"  双色球总获奖次数: {total_awards}次")
+        def parse_stage(pool):
+            pending = []
+            while True:
+                page = raw_pages.get()
+                if page is None:
                     break
-
-            return detail_data
-
-        except Exception as e:
-            print(f"解析专家 {expert_name} 详细信息时出错: {e}")
-            return {
-                'name': expert_name,
-                'experience_years': 0,
-                'article_count': 0,
-                'total_awards': 0
-            }
-
-    def crawl_experts_data(self):
-        """爬取所有专家数据"""
+                if pool is None:
+                    expert_id, detail_data = _parse_expert_page(*page)
+                    results[expert_id] = detail_data
+                else:
+                    pending.append(pool.submit(_parse_expert_page, *page))
+            for future in as_completed(pending):
+                expert_id, detail_data = future.result()
+                results[expert_id] = detail_data
+
+        # 抓取线程运行期间才会启动解析进程，不能从多线程进程中fork，改用forkserver（Windows上为spawn）
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        pool = (ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context(start_method))
+                if parse_workers > 0 else None)
+        parser_thread = threading.Thread(target=parse_stage, args=(pool,), daemon=True)
+        parser_thread.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(fetch, expert_id, expert_name) for expert_id, expert_name in experts]
+                step = max(1, len(futures) // 10)
+                for done, _ in enumerate(as_completed(futures), 1):
+                    if done % step == 0 or done == len(futures):
+                        print(f"已抓取 {done}/{len(futures)} 位专家的详情页")
+        finally:
+            raw_pages.put(None)
+            parser_thread.join()
+            if pool is not None:
+                pool.shutdown()
+        return results
+
+    def crawl_experts_data(self, limit=None, experts_list=None, parse_workers=None):
+        """爬取排行前limit位专家的数据（limit为None时不限制），详情页经抓取、解析两阶段流水线获取；
+        experts_list为排行接口格式的专家列表或迭代器，默认使用ranking_experts得到的完整排行"""
         # 获取专家列表
-        experts_list = self.get_expert_list()
-        if not experts_list:
+        if experts_list is None:
+            experts_list = self.ranking_experts()
+
+        # 限制获取前limit位专家
+        experts_to_process = list(itertools.islice(experts_list or [], limit))
+        if not experts_to_process:
             print("无法获取专家列表，程序退出")
             return None
-
         all_expert_data = []
-
-        # 限制获取前30位专家
-        experts_to_process = experts_list[:30]
-
-        # 初始化浏览器（只开启一次）
-        driver = None
-        try:
-            print("正在初始化浏览器...")
-            options = webdriver.ChromeOptions()
-            # options.add_argument('--headless')  # 无头模式
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-            print("浏览器初始化完成")
-
-            for i, expert in enumerate(experts_to_process):
-                expert_id = expert.get('expertId')
-                expert_name = expert.get('name', f'专家{i+1}')
-
-                print(f"\n处理第 {i+1}/30 位专家: {expert_name}")
-
-                # 获取基本信息
-                basic_data = {
-                    'expert_id': expert_id,
-                    'name': expert_name,
-                    'lottery': expert.get('lottery', 0),
-                    'follow': expert.get('follow', 0),
-                    'grade_name': expert.get('gradeName', ''),
-                    'rank': expert.get('rank', 0),
-                    'norm': expert.get('norm', 0),
-                    'best_record': expert.get('bestRecord', ''),
-                    'good_record': expert.get('goodRecord', '')
-                }
-
-                # 获取详细信息（传入已创建的driver）
-                detail_data = self.get_expert_detail_with_driver(driver, expert_id, expert_name)
-                if detail_data:
-                    # 合并基本信息和详细信息
-                    basic_data.update(detail_data)
-
-                all_expert_data.append(basic_data)
-
-                # 添加延时避免请求过快
-                time.sleep(1)
-
-        except Exception as e:
-            print(f"爬取专家数据时出错: {e}")
-        finally:
-            # 确保浏览器被关闭
-            if driver:
-                print("正在关闭浏览器...")
-                driver.quit()
-                print("浏览器已关闭")
-
+        for i, expert in enumerate(experts_to_process):
+            # 获取基本信息
+            all_expert_data.append({
+                'expert_id': expert.get('expertId'),
+                'name': expert.get('name', f'专家{i+1}'),
+                'lottery': expert.get('lottery', 0),
+                'follow': expert.get('follow', 0),
+                'grade_name': expert.get('gradeName', ''),
+                'rank': expert.get('rank', 0),
+                'norm': expert.get('norm', 0),
+                'best_record': expert.get('bestRecord', ''),
+                'good_record': expert.get('goodRecord', '')
+            })
+
+        # 流水线获取详细信息，结果保持排行顺序
+        start_time = time.perf_counter()
+        details = self.fetch_expert_details([(data['expert_id'], data['name']) for data in all_expert_data],
+                                            parse_workers)
+        for basic_data in all_expert_data:
+            detail_data = details.get(basic_data['expert_id'])
+            if detail_data:
+                # 合并基本信息和详细信息
+                basic_data.update(detail_data)
+
+        print(f"专家详情获取完成，耗时 {time.perf_counter() - start_time:.1f} 秒")
         return all_expert_data
 
-    def get_expert_detail_with_driver(self, driver, expert_id, expert_name):
-        """使用已有的浏览器实例获取专家详细信息"""
-        try:
-            url = self.expert_detail_url.format(expert_id)
-            print(f"  正在获取专家 {expert_name} (ID: {expert_id}) 的详细信息...")
-
-            # 使用已有的driver访问页面
-            driver.get(url)
-            time.sleep(2)
-
-            # 等待页面加载
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "okami-text"))
-            )
-
-            # 获取页面HTML
-            html = driver.page_source
-
-            return self.parse_expert_detail(html, expert_name)
-
-        except Exception as e:
-            print(f"  获取专家 {expert_name} 详细信息失败: {e}")
-            return None
-
-    def save_to_csv(self, expert_data, filename='expert_analysis_result.csv'):
-        """保存数据到CSV文件"""
+    def save_to_csv(self, expert_data, filename='expert_analysis_result.csv', store_path='expert_analysis_result.store'):
+        """保存数据到CSV文件，同时写入类型化存储供下次直接加载"""
         try:
             df = pd.DataFrame(expert_data)
             df.to_csv(filename, index=False, encoding='utf-8-sig')
+            ColumnStore(store_path).save(frame_arrays(df, EXPERT_COLUMN_TYPES), file_signature(filename))
             print(f"\n数据已保存到 {filename}")
             print(f"共保存了 {len(df)} 位专家的数据")
             return df
@@ -1172,13 +3884,35 @@ class ExpertAnalyzer:
             print(f"保存CSV文件时出错: {e}")
             return None
 
-    def analyze_and_visualize(self, df):
-        """分析数据并进行可视化"""
+    def analyze_and_visualize(self, df, plot=True):
+        """分析数据并进行可视化，统计量由ExpertStatistics一次计算，plot为False时只计算不绘图"""
         if df is None or df.empty:
             print("没有数据可供分析")
             return
 
         print("\n开始数据分析和可视化...")
+        df['win_rate'] = expert_win_rate(df['total_awards'], df['article_count'])
+        self.statistics = ExpertStatistics.compute(df)
+        if plot:
+            self.plot_expert_statistics(df, self.statistics)
+
+        # 输出统计摘要
+        means = self.statistics.means
+        correlation = self.statistics.correlation
+        print("\n=== 专家数据统计摘要 ===")
+        print(f"总专家数: {len(df)}")
+        print(f"平均彩龄: {means['experience_years']:.1f}年")
+        print(f"平均文章数: {means['article_count']:.0f}篇")
+        print(f"平均获奖次数: {means['total_awards']:.1f}次")
+        print(f"平均中奖率: {means['win_rate']:.3f}")
+        print(f"彩龄与获奖次数相关系数: {correlation.loc['experience_years', 'total_awards']:.3f}")
+        print(f"文章数量与获奖次数相关系数: {correlation.loc['article_count', 'total_awards']:.3f}")
+
+        return df
+
+    def plot_expert_statistics(self, df, statistics):
+        """绘制专家数据的12个统计图，相关系数和等级汇总直接使用statistics中的结果"""
+        correlation = statistics.correlation
 
         # 设置图形样式
         fig = plt.figure(figsize=(20, 15))
@@ -1221,8 +3955,7 @@ class ExpertAnalyzer:
         plt.ylabel('文章数量')
         plt.grid(True, alpha=0.3)
 
-        # 计算相关系数
-        corr_exp_article = df['experience_years'].corr(df['article_count'])
+        corr_exp_article = correlation.loc['experience_years', 'article_count']
         plt.text(0.05, 0.95, f'相关系数: {corr_exp_article:.3f}',
                 transform=plt.gca().transAxes, fontsize=10,
                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
@@ -1235,8 +3968,7 @@ class ExpertAnalyzer:
         plt.ylabel('获奖次数')
         plt.grid(True, alpha=0.3)
 
-        # 计算相关系数
-        corr_exp_awards = df['experience_years'].corr(df['total_awards'])
+        corr_exp_awards = correlation.loc['experience_years', 'total_awards']
         plt.text(0.05, 0.95, f'相关系数: {corr_exp_awards:.3f}',
                 transform=plt.gca().transAxes, fontsize=10,
                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
@@ -1249,15 +3981,14 @@ class ExpertAnalyzer:
         plt.ylabel('获奖次数')
         plt.grid(True, alpha=0.3)
 
-        # 计算相关系数
-        corr_article_awards = df['article_count'].corr(df['total_awards'])
+        corr_article_awards = correlation.loc['article_count', 'total_awards']
         plt.text(0.05, 0.95, f'相关系数: {corr_article_awards:.3f}',
                 transform=plt.gca().transAxes, fontsize=10,
                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
         # 8. 不同等级专家的获奖情况
         plt.subplot(3, 4, 8)
-        grade_awards = df.groupby('grade_name')['total_awards'].mean().sort_values(ascending=False)
+        grade_awards = statistics.grade_summary()['total_awards'].sort_values(ascending=False)
         grade_awards.plot(kind='bar', color='teal', alpha=0.7)
         plt.title('不同等级专家平均获奖次数', fontsize=14, fontweight='bold')
         plt.xlabel('专家等级')
@@ -1283,8 +4014,6 @@ class ExpertAnalyzer:
 
         # 11. 中奖率分析（获奖次数/文章数量）
         plt.subplot(3, 4, 11)
-        # 避免除零错误
-        df['win_rate'] = df.apply(lambda x: x['total_awards'] / x['article_count'] if x['article_count'] > 0 else 0, axis=1)
         plt.hist(df['win_rate'], bins=10, alpha=0.7, color='cyan', edgecolor='black')
         plt.title('专家中奖率分布', fontsize=14, fontweight='bold')
         plt.xlabel('中奖率（获奖次数/文章数量）')
@@ -1293,8 +4022,7 @@ class ExpertAnalyzer:
 
         # 12. 综合分析热力图
         plt.subplot(3, 4, 12)
-        correlation_data = df[['experience_years', 'article_count', 'total_awards', 'follow', 'norm', 'win_rate']].corr()
-        sns.heatmap(correlation_data, annot=True, cmap='coolwarm', center=0,
+        sns.heatmap(correlation, annot=True, cmap='coolwarm', center=0,
                    square=True, linewidths=0.5, cbar_kws={"shrink": .8})
         plt.title('各指标相关性热力图', fontsize=14, fontweight='bold')
 
@@ -1302,17 +4030,11 @@ class ExpertAnalyzer:
         plt.savefig('expert_analysis.png', dpi=300, bbox_inches='tight')
         plt.show()
 
-        # 输出统计摘要
-        print("\n=== 专家数据统计摘要 ===")
-        print(f"总专家数: {len(df)}")
-        print(f"平均彩龄: {df['experience_years'].mean():.1f}年")
-        print(f"平均文章数: {df['article_count'].mean():.0f}篇")
-        print(f"平均获奖次数: {df['total_awards'].mean():.1f}次")
-        print(f"平均中奖率: {df['win_rate'].mean():.3f}")
-        print(f"彩龄与获奖次数相关系数: {corr_exp_awards:.3f}")
-        print(f"文章数量与获奖次数相关系数: {corr_article_awards:.3f}")
-
-        return df
+    def update_statistics(self, new_df):
+        """追加新专家后增量更新统计结果，只处理新增的行"""
+        if self.statistics is None:
+            self.statistics = ExpertStatistics()
+        return self.statistics.update(new_df)
 
     def run_expert_analysis(self):
         """运行专家数据分析的完整流程"""
@@ -1320,13 +4042,19 @@ class ExpertAnalyzer:
 
         # 首先检查是否存在已保存的专家数据文件
         expert_csv_file = 'expert_analysis_result.csv'
+        expert_store = ColumnStore('expert_analysis_result.store')
         expert_data = None
         df = None
 
-        # 尝试从CSV文件读取专家数据
+        # 尝试从类型化存储读取专家数据（CSV更新过时改读CSV并重建存储）
         print("正在检查本地专家数据文件...")
         try:
-            df = pd.read_csv(expert_csv_file, encoding='utf-8-sig')
+            source = file_signature(expert_csv_file)
+            if expert_store.exists() and (source is None or expert_store.meta().get('source') == source):
+                df = pd.DataFrame(expert_store.load())
+            else:
+                df = pd.read_csv(expert_csv_file, encoding='utf-8-sig')
+                expert_store.save(frame_arrays(df, EXPERT_COLUMN_TYPES), source)
             if not df.empty and len(df) > 0:
                 print(f"✅ 从本地文件 `{expert_csv_file}` 成功读取到 {len(df)} 位专家的数据")
                 self.analyze_and_visualize(df)
@@ -0,0 +1,215 @@
+"""使用本地测试服务器（DLTFixtureServer）离线测试HTTP爬取流程"""
+import os
+import threading
+import time
+
+import pytest
+
+import homework4 as hw
+
+
+@pytest.fixture(scope='module')
+def draws():
+    return hw.generate_synthetic_draws(120, seed=7)
+
+
+@pytest.fixture(scope='module')
+def experts():
+    return hw.generate_synthetic_experts(30, seed=7)
+
+
+@pytest.fixture
+def server(draws, experts):
+    with hw.DLTFixtureServer(draws, experts=experts) as fixture:
+        yield fixture
+
+
+@pytest.mark.parametrize('parser', hw.available_parsers())
+def test_crawl_lottery_data_matches_parsed_pages(server, draws, parser):
+    """HTTP接口得到的开奖数据与解析同样内容的开奖页面得到的数据一致"""
+    spider = hw.DLTSpider(api_url=server.api_url)
+    crawled = spider.crawl_lottery_data(100)
+
+    records = hw.lottery_data_to_api_records(draws[:100])
+    pages = [hw.render_lottery_table(records[start:start + 30]) for start in range(0, len(records), 30)]
+    assert crawled == spider.parse_lottery_data(pages, parser=parser, verbose=False)
+    assert [row['期号'] for row in crawled] == [row['期号'] for row in draws[:100]]
+
+
+def test_crawl_new_draws_stops_after_first_page(server, draws):
+    """新开奖都在第1页时只请求一页"""
+    spider = hw.DLTSpider(api_url=server.api_url)
+    pages = []
+    fetch_api_page = spider.fetch_api_page
+
+    def counting_fetch(page_num, *args, **kwargs):
+        pages.append(page_num)
+        return fetch_api_page(page_num, *args, **kwargs)
+
+    spider.fetch_api_page = counting_fetch
+    new_draws = spider.crawl_new_draws(int(draws[5]['期号']))
+
+    assert pages == [1]
+    assert [row['期号'] for row in new_draws] == [row['期号'] for row in draws[:5]]
+
+
+@pytest.mark.parametrize('parse_workers', [0, 1])
+def test_crawl_experts_data_matches_synthetic_experts(server, experts, parse_workers):
+    """并发抓取的专家详情与生成的专家数据一致，并保持排行顺序"""
+    analyzer = hw.ExpertAnalyzer(expert_detail_url=server.expert_detail_url, rate=1000, workers=4)
+    data = analyzer.crawl_experts_data(limit=None, experts_list=experts, parse_workers=parse_workers)
+
+    assert [row['expert_id'] for row in data] == [expert['expertId'] for expert in experts]
+    for row, expert in zip(data, experts):
+        assert row['experience_years'] == expert['detail']['experience_years']
+        assert row['article_count'] == expert['detail']['article_count']
+        assert row['total_awards'] == sum(expert['detail']['awards'])
+
+
+class _StubDriver:
+    def __init__(self):
+        self.closed = False
+
+    def quit(self):
+        self.closed = True
+
+
+def test_browser_pool_broken_release_wakes_waiter():
+    """丢弃出错的浏览器后，正在等待的使用者新建实例而不是一直等待"""
+    created = []
+
+    def factory():
+        created.append(_StubDriver())
+        return created[-1]
+
+    pool = hw.BrowserPool(size=1, factory=factory)
+    first = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.2)
+    assert waiter.is_alive() and not acquired
+
+    pool.release(first, broken=True)
+    waiter.join(timeout=5)
+    assert acquired == [created[1]]
+    assert first.closed and len(created) == 2
+
+    pool.release(acquired[0])
+    assert pool.acquire(timeout=1) is created[1]
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+
+
+def test_expert_ranking_pagination_dedup_and_resume(draws, tmp_path):
+    """分页排行去重写入存储，中断后从断点继续，crawl_experts_data默认分析完整排行"""
+    experts = hw.generate_synthetic_experts(70, seed=3)
+    with hw.DLTFixtureServer(draws, experts=experts + experts[:5]) as server:
+        analyzer = hw.ExpertAnalyzer(ranking_url=server.expert_ranking_url, expert_detail_url=server.expert_detail_url,
+                                     ranking_store=str(tmp_path / 'ranking.store'), rate=1000, workers=2)
+        requested = []
+        fetch_ranking_page = analyzer.fetch_ranking_page
+
+        def failing_fetch(page, page_size=30, target='总分', issue_num=7):
+            requested.append((target, page))
+            if target == '胜率' and page == 2:
+                raise ConnectionError('模拟中断')
+            return fetch_ranking_page(page, page_size, target, issue_num)
+
+        analyzer.fetch_ranking_page = failing_fetch
+        with pytest.raises(ConnectionError):
+            analyzer.crawl_expert_ranking(targets=('总分', '胜率'))
+        assert ('总分', 3) in requested
+
+        requested.clear()
+        analyzer.fetch_ranking_page = lambda page, *args: requested.append(page) or fetch_ranking_page(page, *args)
+        assert analyzer.crawl_expert_ranking(targets=('总分', '胜率'), resume=True) == 70
+        assert requested and min(requested) == 2
+
+        ranking = list(analyzer.iter_ranking_store())
+        assert [expert['expertId'] for expert in ranking] == [expert['expertId'] for expert in experts]
+        assert ranking[0]['name'] == experts[0]['name']
+
+        data = analyzer.crawl_experts_data(parse_workers=0)
+        assert len(data) == 70
+        assert data[-1]['total_awards'] == sum(experts[-1]['detail']['awards'])
+
+
+def test_store_unchanged_by_update_without_new_draws(server, draws, tmp_path):
+    """CSV按日期正序保存时，没有新开奖的增量更新不会改变存储内容"""
+    csv_file = str(tmp_path / 'draws.csv')
+    hw.pd.DataFrame(draws[::-1]).to_csv(csv_file, index=False, encoding='utf-8-sig')
+    store = hw.ColumnStore(str(tmp_path / 'draws.store'))
+    hw.load_lottery_store(store, csv_file)
+    digest = store.meta()['digest']
+
+    updated = hw.lottery_arrays(hw.update_lottery_data(hw.DLTSpider(api_url=server.api_url), csv_file))
+    assert not store.save(updated, hw.file_signature(csv_file))
+    assert store.meta()['digest'] == digest
+    assert list(store.load()['期号'][:2]) == [draws[0]['期号'], draws[1]['期号']]
+
+
+def test_shift_done_pages_after_new_draws():
+    """新开奖使页面后移时，只保留内容仍全部位于已完成页面中的新页码"""
+    done = [1, 2, 3, 4, 5]
+    assert hw.shift_done_pages(done, 0, 100, 1000) == done
+    assert hw.shift_done_pages(done, 1, 100, 1001) == [2, 3, 4, 5]
+    assert hw.shift_done_pages(done, 100, 100, 1100) == [2, 3, 4, 5, 6]
+    assert hw.shift_done_pages([1, 3], 1, 100, 1001) == []
+
+
+def test_parsers_agree_on_table_without_tbody(draws):
+    """没有tbody的表格，selectolax（HTML5解析会补上tbody）与lxml、bs4结果一致"""
+    pytest.importorskip('selectolax')
+    pytest.importorskip('lxml')
+    page = hw.render_lottery_table(hw.lottery_data_to_api_records(draws[:10]))
+    without_tbody = page.replace('<tbody>', '').replace('</tbody>', '')
+    assert hw._extract_rows_selectolax(without_tbody) == hw._extract_rows_lxml(without_tbody) == \
+        hw._extract_rows_bs4(without_tbody) == ('no_tbody', [])
+    assert hw._extract_rows_selectolax(page) == hw._extract_rows_lxml(page)
+
+
+def test_generate_tickets_raises_on_impossible_constraints():
+    """约束无法满足时抛出ValueError而不是无限循环"""
+    rng = hw.np.random.default_rng(0)
+    scores = hw.np.ones(hw.FRONT_MAX), hw.np.ones(hw.BACK_MAX)
+    with pytest.raises(ValueError):
+        hw.generate_tickets(*scores, 10, rng=rng, odd_range=(6, 6), chunk_size=1000)
+    front, back = hw.generate_tickets(*scores, 10, rng=rng, chunk_size=1000)
+    assert front.shape == (10, hw.FRONT_PICK) and back.shape == (10, hw.BACK_PICK)
+
+
+def test_response_cache_evicts_to_max_bytes(tmp_path):
+    """缓存总大小超过max_bytes时淘汰最久未使用的条目，大小计数与磁盘一致"""
+    cache = hw.ResponseCache(str(tmp_path), max_bytes=20000)
+    body = os.urandom(2000)
+    keys = [cache.key(f'http://example.com/expertItem?id={i}') for i in range(40)]
+    for key in keys:
+        cache.store(key, 'http://example.com/expertItem', body)
+
+    files = [path for path in tmp_path.iterdir() if path.suffix == '.gz']
+    assert 0 < len(files) < len(keys)
+    assert cache._total == sum(path.stat().st_size for path in files) <= cache.max_bytes
+    assert cache.load(keys[-1]) is not None and cache.load(keys[0]) is None
+    assert hw.ResponseCache(str(tmp_path), max_bytes=20000)._total == cache._total
+
+
+def test_issue_numbers_keep_leading_zeros(tmp_path):
+    """期号07001经过CSV、存储和导出后保持不变，并能按期号兑奖"""
+    records = hw.generate_synthetic_draws(20, seed=2)
+    for i, record in enumerate(records):
+        record['期号'] = f"07{20 - i:03d}"
+    csv_file = str(tmp_path / 'draws.csv')
+    hw.pd.DataFrame(records).to_csv(csv_file, index=False, encoding='utf-8-sig')
+    store = hw.ColumnStore(str(tmp_path / 'draws.store'))
+    hw.load_lottery_store(store, csv_file)
+    arrays = hw.load_lottery_store(store, csv_file)
+
+    export_file = str(tmp_path / 'export.csv')
+    hw.lottery_frame(arrays).to_csv(export_file, index=False, encoding='utf-8-sig')
+    exported = hw.pd.read_csv(export_file, encoding='utf-8-sig', dtype=str)
+    assert exported['期号'].tolist() == [record['期号'] for record in records]
+
+    analyzer = hw.DLTAnalyzer(arrays, cutoff_date=None)
+    result = analyzer.check_tickets(hw.np.array([[1, 2, 3, 4, 5]]), hw.np.array([[1, 2]]), periods=['07001'])
+    assert result is not None and list(result['期号']) == ['07001']